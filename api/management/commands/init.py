@@ -15,7 +15,7 @@ from django.contrib.auth import get_user_model
 from django.core.management import call_command
 from django.core.management.base import BaseCommand
 
-from aria2.models import Aria2c, Aria2cArgument, Aria2cInstance
+from aria2.models import Argument, Binary, Instance
 
 AppConfig = TypeVar("AppConfig", bound=_AppConfig)
 
@@ -162,7 +162,7 @@ class Command(BaseCommand):
         :return:
         :rtype: None
         """
-        aria2cs = Aria2c.objects.create_from_file_system()
+        aria2cs = Binary.objects.create_from_file_system()
         paths = list(str(path) for path in aria2cs.values_list("path", flat=True))
         self.stdout.write(
             self.style.SUCCESS(
@@ -173,12 +173,12 @@ class Command(BaseCommand):
 
     def _load_arguments(self) -> None:
         """
-        load arguments
+        load arguments of the binaries found on the file system
         :return:
         :rtype: None
         """
-        for aria2c in Aria2c.objects.all():
-            arguments = Aria2cArgument.objects.create_from_aria2c(aria2c)
+        for aria2c in Binary.objects.filter(missing=False):
+            arguments = Argument.objects.create_from_binary(aria2c)
             self.stdout.write(
                 self.style.SUCCESS(
                     f"Load [{len(arguments)}] arguments from [{aria2c}]."
@@ -191,8 +191,8 @@ class Command(BaseCommand):
         :return:
         :rtype: None
         """
-        for aria2c in Aria2c.objects.all():
-            instances = Aria2cInstance.objects.create_all_from_aria2c(aria2c)
+        for aria2c in Binary.objects.all():
+            instances = Instance.objects.create_all_from_aria2c(aria2c)
             self.stdout.write(
                 self.style.SUCCESS(
                     f"Load [{len(instances)}] instances from [{aria2c}]:\n"
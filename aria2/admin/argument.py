@@ -44,6 +44,7 @@ class Aria2cArgumentAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
         "short_argument",
         "default",
         "description",
+        "placeholder",
         "possible_values",
         "binary",
     )
@@ -4,7 +4,8 @@ The admin of Aria2 GID model of aria2
 import logging
 from typing import Optional, TypeVar
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db.models import QuerySet
 from django.http import HttpRequest as _HttpRequest
 from django.http import HttpResponse
 
@@ -15,6 +16,29 @@ HttpRequest = TypeVar("HttpRequest", bound=_HttpRequest)
 logger = logging.getLogger(__name__)
 
 
+@admin.action(description="Submit the selected tasks not submitted yet")
+def submit_pending(
+    modeladmin: admin.ModelAdmin, request: HttpRequest, queryset: QuerySet
+) -> None:
+    """
+
+    :param modeladmin:
+    :type modeladmin: admin.ModelAdmin
+    :param request:
+    :type request: HttpRequest
+    :param queryset:
+    :type queryset: QuerySet
+    :return:
+    :rtype: None
+    """
+    submitted, failures = queryset.submit_pending()
+    modeladmin.message_user(request, f"[{submitted}] tasks are submitted.")
+    for task, exc in failures.items():
+        modeladmin.message_user(
+            request, f"Fail to submit [{task}]: {exc}", level=messages.ERROR
+        )
+
+
 @admin.register(GID)
 class Aria2cGIDAdmin(admin.ModelAdmin):
     """
@@ -27,6 +51,8 @@ class Aria2cGIDAdmin(admin.ModelAdmin):
         "completed_percentage",
         "completed_length",
         "total_length",
+        "download_speed",
+        "upload_speed",
         "dir",
         "verbose_status",
         "instance",
@@ -39,16 +65,21 @@ class Aria2cGIDAdmin(admin.ModelAdmin):
         "completed_percentage",
         "completed_length",
         "total_length",
+        "download_speed",
+        "upload_speed",
         "dir",
         "updated_at",
         "created_at",
     )
+    list_filter = ("status", "instance")
     readonly_fields = (
         "gid",
         "status",
         "completed_percentage",
         "completed_length",
         "total_length",
+        "download_speed",
+        "upload_speed",
         "dir",
         "verbose_status",
         "created_at",
@@ -65,8 +96,8 @@ class Aria2cGIDAdmin(admin.ModelAdmin):
         :rtype: Optional[float]
         """
         try:
-            return round(int(obj.completed_length) / int(obj.total_length), 2)
-        except ZeroDivisionError:
+            return round(obj.completed_length / obj.total_length, 2)
+        except (TypeError, ZeroDivisionError):
             return None
 
     def has_change_permission(
@@ -90,9 +121,10 @@ class Aria2cGIDUriAdmin(admin.ModelAdmin):
     The admin of Aria2 GID Uri model of aria2
     """
 
+    actions = (submit_pending,)
     change_form_template = "aria2/admin/change_form_gid.html"
-    list_display = ("gid", "uris", "options", "position")
-    readonly_fields = ("gid",)
+    list_display = ("gid", "uris", "options", "position", "submitted_at")
+    readonly_fields = ("gid", "submitted_at")
 
     def response_change(self, request: HttpRequest, obj: GIDUri) -> HttpResponse:
         """
@@ -104,7 +136,7 @@ class Aria2cGIDUriAdmin(admin.ModelAdmin):
         :return:
         :rtype: HttpResponse
         """
-        if "_create-gid" in request.POST and not obj.gid:
+        if "_create-gid" in request.POST and not obj.submitted_at:
             obj.create_gid()
         return super().response_change(request, obj)
 
@@ -115,9 +147,10 @@ class Aria2cGIDTorrentAdmin(admin.ModelAdmin):
     The admin of Aria2 GID Torrent model of aria2
     """
 
+    actions = (submit_pending,)
     change_form_template = "aria2/admin/change_form_gid.html"
-    list_display = ("gid", "torrent", "uris", "options", "position")
-    readonly_fields = ("gid",)
+    list_display = ("gid", "torrent", "uris", "options", "position", "submitted_at")
+    readonly_fields = ("gid", "submitted_at")
 
     def response_change(self, request: HttpRequest, obj: GIDTorrent) -> HttpResponse:
         """
@@ -129,7 +162,7 @@ class Aria2cGIDTorrentAdmin(admin.ModelAdmin):
         :return:
         :rtype: HttpResponse
         """
-        if "_create-gid" in request.POST and not obj.gid:
+        if "_create-gid" in request.POST and not obj.submitted_at:
             obj.create_gid()
         return super().response_change(request, obj)
 
@@ -140,9 +173,10 @@ class Aria2cGIDMetaLinkAdmin(admin.ModelAdmin):
     The admin of Aria2 GID MetaLink model of aria2
     """
 
+    actions = (submit_pending,)
     change_form_template = "aria2/admin/change_form_gid.html"
-    list_display = ("gid", "metalink", "options", "position")
-    readonly_fields = ("gid",)
+    list_display = ("gid", "metalink", "options", "position", "submitted_at")
+    readonly_fields = ("gid", "submitted_at")
 
     def response_change(self, request: HttpRequest, obj: GIDMetaLink) -> HttpResponse:
         """
@@ -154,6 +188,6 @@ class Aria2cGIDMetaLinkAdmin(admin.ModelAdmin):
         :return:
         :rtype: HttpResponse
         """
-        if "_create-gid" in request.POST and not obj.gid:
+        if "_create-gid" in request.POST and not obj.submitted_at:
             obj.create_gid()
         return super().response_change(request, obj)
@@ -2,7 +2,6 @@
 The admin of Aria2 model of aria2
 """
 import logging
-import subprocess
 
 from django.contrib import admin
 from django.utils.html import format_html
@@ -23,6 +22,7 @@ class Aria2cInstanceInline(Aria2cInstanceMixin, admin.TabularInline):
     fields = (
         "pid",
         "command",
+        "alive",
         "effective_user_name",
         "cpu",
         "mem",
@@ -32,6 +32,7 @@ class Aria2cInstanceInline(Aria2cInstanceMixin, admin.TabularInline):
     readonly_fields = (
         "pid",
         "command",
+        "alive",
         "effective_user_name",
         "cpu",
         "mem",
@@ -59,7 +60,7 @@ class Aria2cProfileInline(admin.TabularInline):
         :return:
         :rtype: str
         """
-        return ", ".join(obj.args)
+        return " ".join(obj.args)
 
 
 @admin.register(Binary)
@@ -68,13 +69,21 @@ class Aria2cAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
     The admin of Aria2 model of aria2
     """
 
-    fields = ("path", "verbose_version")
+    fields = ("path", "missing", "sha256", "features", "verbose_version")
     inlines = (Aria2cInstanceInline, Aria2cProfileInline)
-    list_display = ("path", "version", "instances")
-    readonly_fields = ("path", "version", "verbose_version", "instances")
+    list_display = ("path", "version", "missing", "instances")
+    readonly_fields = (
+        "path",
+        "missing",
+        "sha256",
+        "version",
+        "features",
+        "verbose_version",
+        "instances",
+    )
 
     @admin.display()
-    def version(self, obj: Binary) -> str:
+    def features(self, obj: Binary) -> str:
         """
 
         :param obj:
@@ -82,12 +91,7 @@ class Aria2cAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
         :return:
         :rtype: str
         """
-        return (
-            subprocess.check_output([obj.path, "--version"])
-            .decode()
-            .split("\n", maxsplit=1)[0]
-            .replace("aria2 version ", "")
-        )
+        return ", ".join(obj.features)
 
     @admin.display()
     def verbose_version(self, obj: Binary) -> str:
@@ -98,10 +102,7 @@ class Aria2cAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
         :return:
         :rtype: str
         """
-        return format_html(
-            "<pre>{}</pre>",
-            subprocess.check_output([obj.path, "--version"]).decode(),
-        )
+        return format_html("<pre>{}</pre>", obj.verbose_version or "")
 
     @admin.display()
     def instances(self, obj: Binary) -> str:
@@ -3,12 +3,16 @@ The admin of Aria2 Instance model of aria2
 """
 import logging
 import pprint
+from datetime import datetime
 from typing import Optional
 
 from django.contrib import admin
+from django.db.models import QuerySet
+from django.http import HttpRequest
 from django.utils.html import format_html
 
-from ..models import GID, Instance
+from ..models import GID, Instance, ResourceSeries
+from ..process import METRICS
 from .utils import ReadOnlyAdminMixin
 
 logger = logging.getLogger(__name__)
@@ -19,6 +23,27 @@ class Aria2cInstanceMixin:
     The mixin for the admin of Aria2 Instance
     """
 
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        """
+        the processes of all listed instances are read by one walk of /proc
+        :param request:
+        :type request: HttpRequest
+        :return:
+        :rtype: QuerySet
+        """
+        return super().get_queryset(request).with_process()
+
+    @admin.display(boolean=True)
+    def alive(self, obj: Instance) -> bool:
+        """
+
+        :param obj:
+        :type obj: Instance
+        :return:
+        :rtype: bool
+        """
+        return obj.alive
+
     @admin.display()
     def verbose_version(self, obj: Instance) -> Optional[str]:
         """
@@ -36,6 +61,28 @@ class Aria2cInstanceMixin:
         except ConnectionRefusedError as exc:
             logger.exception(exc)
 
+    @admin.display()
+    def resource_history(self, obj: Instance) -> Optional[str]:
+        """
+        the averages of the last hour by minute and of the last day by hour
+        :param obj:
+        :type obj: Instance
+        :return:
+        :rtype: Optional[str]
+        """
+        try:
+            series = obj.resource_series.series
+        except ResourceSeries.DoesNotExist:
+            return None
+        lines = ["".join(f"{name:>20}" for name in ("time", *METRICS))]
+        for archive, rows in zip(series.archives[1:], (60, 24)):
+            for timestamp, values in list(archive)[-rows:]:
+                lines.append(
+                    f"{datetime.fromtimestamp(timestamp):%Y-%m-%d %H:%M}".rjust(20)
+                    + "".join(f"{value:>20.1f}" for value in values)
+                )
+        return format_html("<pre>{}</pre>", "\n".join(lines))
+
     @admin.display()
     def global_statistics(self, obj: Instance) -> Optional[str]:
         """
@@ -123,6 +170,7 @@ class Aria2cInstanceAdmin(ReadOnlyAdminMixin, Aria2cInstanceMixin, admin.ModelAd
         "profile",
         "pid",
         "command",
+        "alive",
         "effective_user_name",
         "cpu",
         "mem",
@@ -131,6 +179,16 @@ class Aria2cInstanceAdmin(ReadOnlyAdminMixin, Aria2cInstanceMixin, admin.ModelAd
         "binary",
         "verbose_version",
         "session_id",
+        "rpc_transport",
+        "rpc_host",
+        "rpc_port",
+        "rpc_websocket",
+        "listen_port_start",
+        "listen_port_end",
+        "session_file",
+        "idle",
+        "stopping",
+        "resource_history",
         "global_statistics",
         "available_methods",
         "available_notifications",
@@ -141,6 +199,7 @@ class Aria2cInstanceAdmin(ReadOnlyAdminMixin, Aria2cInstanceMixin, admin.ModelAd
         "profile",
         "pid",
         "command",
+        "alive",
         "effective_user_name",
         "cpu",
         "mem",
@@ -148,8 +207,12 @@ class Aria2cInstanceAdmin(ReadOnlyAdminMixin, Aria2cInstanceMixin, admin.ModelAd
         "cumulative_cpu_times",
         "binary",
         "version",
+        "idle",
+        "stopping",
     )
     readonly_fields = (
+        "alive",
+        "stopping",
         "effective_user_name",
         "mem",
         "elapsed_time",
@@ -158,6 +221,7 @@ class Aria2cInstanceAdmin(ReadOnlyAdminMixin, Aria2cInstanceMixin, admin.ModelAd
         "version",
         "verbose_version",
         "session_id",
+        "resource_history",
         "global_statistics",
         "available_methods",
         "available_notifications",
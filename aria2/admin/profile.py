@@ -58,9 +58,9 @@ class Aria2cProfileAdmin(admin.ModelAdmin):
     """
 
     change_form_template = "aria2/admin/change_form_profile.html"
-    fields = ("name", "binary")
+    fields = ("name", "binary", "warm_pool_size")
     inlines = (ArgumentPairInline, Aria2cInstanceInline)
-    list_display = ("name", "binary", "args")
+    list_display = ("name", "binary", "args", "warm_pool_size")
 
     def response_change(self, request: HttpRequest, obj: Profile) -> HttpResponse:
         """
@@ -73,5 +73,5 @@ class Aria2cProfileAdmin(admin.ModelAdmin):
         :rtype: HttpResponse
         """
         if "_create-instance" in request.POST:
-            Instance.objects.create_from_profile(obj)
+            Instance.objects.acquire(obj)
         return super().response_change(request, obj)
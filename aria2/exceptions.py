@@ -19,3 +19,9 @@ class CommandExecutionFailed(Aria2Exception):
     """
     the command of aria2c execution failed in the given time
     """
+
+
+class InvalidOption(Aria2Exception):
+    """
+    the options are not accepted by aria2c
+    """
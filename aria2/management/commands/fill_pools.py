@@ -0,0 +1,71 @@
+"""
+This command is going to keep the warm pools of the profiles filled with idle instances
+of aria2c
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from aria2.models import Instance, Profile
+
+
+class Command(BaseCommand):
+    """
+    keep the warm pools of the profiles filled with idle instances of aria2c
+    """
+
+    help = "Keep the warm pools of the profiles filled with idle instances of aria2c"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+
+        :param parser:
+        :type parser: CommandParser
+        :return:
+        :rtype: None
+        """
+        parser.add_argument(
+            "--interval",
+            default=0,
+            help="the seconds between two fillings, fill only once if 0",
+            type=float,
+        )
+        parser.add_argument(
+            "--timeout",
+            default=None,
+            help="the seconds to wait for each instance to be ready",
+            type=float,
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        """
+
+        :param args:
+        :type args: Any
+        :param options:
+        :type options: Any
+        :return:
+        :rtype: Optional[str]
+        """
+        while True:
+            for profile in Profile.objects.filter(warm_pool_size__gt=0):
+                instances, failures = Instance.objects.fill_pool(
+                    profile, options["timeout"]
+                )
+                if instances:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"[{len(instances)}] idle instances are launched in the "
+                            f"warm pool of [{profile}]."
+                        )
+                    )
+                for _, exc in failures:
+                    self.stderr.write(
+                        self.style.ERROR(f"Fail to launch [{profile}]: {exc}")
+                    )
+            if not options["interval"]:
+                return None
+            time.sleep(options["interval"])
@@ -0,0 +1,79 @@
+"""
+This command is going to launch the instances of aria2c by profiles concurrently
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from aria2.models import Instance, Profile
+
+
+class Command(BaseCommand):
+    """
+    launch the instances of aria2c by profiles concurrently
+    """
+
+    help = "Launch the instances of aria2c by profiles concurrently"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+
+        :param parser:
+        :type parser: CommandParser
+        :return:
+        :rtype: None
+        """
+        parser.add_argument(
+            "profiles",
+            help="the names of the profiles, all profiles not running if not given",
+            nargs="*",
+        )
+        parser.add_argument(
+            "--count",
+            default=1,
+            help="the number of instances to launch by each profile",
+            type=int,
+        )
+        parser.add_argument(
+            "--timeout",
+            default=None,
+            help="the seconds to wait for each instance to be ready",
+            type=float,
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        """
+
+        :param args:
+        :type args: Any
+        :param options:
+        :type options: Any
+        :return:
+        :rtype: Optional[str]
+        """
+        profiles = Profile.objects.select_related("binary")
+        if options["profiles"]:
+            profiles = profiles.filter(name__in=options["profiles"])
+            if missing := set(options["profiles"]).difference(
+                profiles.values_list("name", flat=True)
+            ):
+                raise CommandError(f"Profiles not found: {sorted(missing)}")
+        else:
+            profiles = profiles.filter(instance__isnull=True)
+
+        instances, failures = Instance.objects.create_from_profiles(
+            [profile for profile in profiles for _ in range(options["count"])],
+            options["timeout"],
+        )
+        for instance in instances:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Launch [{instance.profile}]: pid [{instance.pid}], "
+                    f"RPC [{instance.rpc_server_address}]."
+                )
+            )
+        for profile, exc in failures:
+            self.stderr.write(self.style.ERROR(f"Fail to launch [{profile}]: {exc}"))
+        return None
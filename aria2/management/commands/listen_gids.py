@@ -0,0 +1,173 @@
+"""
+This command is going to mirror the status of GIDs by the notifications of the
+instances of aria2c
+
+* https://aria2.github.io/manual/en/html/aria2c.html#notifications
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import time
+from collections import defaultdict
+from functools import partial
+from typing import Any, Optional
+from xmlrpc.client import Fault, ProtocolError
+
+from websockets.exceptions import InvalidHandshake
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from aria2.models import GID, Instance
+from aria2.rpc import WebSocketServerProxy
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS = {
+    "aria2.onDownloadStart",
+    "aria2.onDownloadPause",
+    "aria2.onDownloadStop",
+    "aria2.onDownloadComplete",
+    "aria2.onDownloadError",
+    "aria2.onBtDownloadComplete",
+}
+
+
+def notify(
+    changes: queue.Queue, pid: int, method: str, params: list[dict[str, Any]]
+) -> None:
+    """
+    queue the GIDs notified by aria2, without blocking the thread receiving messages
+    :param changes:
+    :type changes: queue.Queue
+    :param pid:
+    :type pid: int
+    :param method:
+    :type method: str
+    :param params:
+    :type params: list[dict[str, Any]]
+    :return:
+    :rtype: None
+    """
+    if method not in NOTIFICATIONS:
+        return
+    for event in params:
+        changes.put((pid, event["gid"]))
+
+
+class Command(BaseCommand):
+    """
+    mirror the status of GIDs by the notifications of the instances of aria2c
+    """
+
+    help = "Mirror the status of GIDs by the notifications of the instances of aria2c"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+
+        :param parser:
+        :type parser: CommandParser
+        :return:
+        :rtype: None
+        """
+        parser.add_argument(
+            "--debounce",
+            default=0.5,
+            help="the seconds to collect notifications before fetching the status",
+            type=float,
+        )
+        parser.add_argument(
+            "--reconnect-interval",
+            default=5,
+            help="the seconds between two attempts to connect the instances",
+            type=float,
+        )
+
+    def _connect(
+        self,
+        instances: dict[int, Instance],
+        listeners: dict[int, WebSocketServerProxy],
+        changes: queue.Queue,
+    ) -> None:
+        """
+        listen to the instances not listened yet, and mirror all of their downloads
+        once connected, since the notifications before are missed
+        :param instances:
+        :type instances: dict[int, Instance]
+        :param listeners:
+        :type listeners: dict[int, WebSocketServerProxy]
+        :param changes:
+        :type changes: queue.Queue
+        :return:
+        :rtype: None
+        """
+        instances.clear()
+        instances.update((instance.pk, instance) for instance in Instance.objects.all())
+
+        for pid in set(listeners).difference(instances):
+            listeners.pop(pid).close()
+
+        for pid, instance in instances.items():
+            if pid in listeners and listeners[pid].connected:
+                continue
+            if not instance.rpc_websocket:
+                continue
+            listener = WebSocketServerProxy(
+                instance.rpc_websocket_address, instance.rpc_secret
+            )
+            listener.listeners.append(partial(notify, changes, pid))
+            try:
+                listener.connect()
+                created, updated = GID.objects.sync_from_instance(instance)
+            except (Fault, InvalidHandshake, OSError, ProtocolError) as exc:
+                logger.exception(exc)
+                listener.close()
+                continue
+            listeners[pid] = listener
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Listen to [{instance.rpc_websocket_address}]: "
+                    f"[{created}] GIDs created, [{updated}] updated."
+                )
+            )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        """
+
+        :param args:
+        :type args: Any
+        :param options:
+        :type options: Any
+        :return:
+        :rtype: Optional[str]
+        """
+        instances: dict[int, Instance] = {}
+        listeners: dict[int, WebSocketServerProxy] = {}
+        changes: queue.Queue[tuple[int, str]] = queue.Queue()
+
+        while True:
+            self._connect(instances, listeners, changes)
+            try:
+                first = changes.get(timeout=options["reconnect_interval"])
+            except queue.Empty:
+                continue
+            time.sleep(options["debounce"])
+
+            gids: dict[int, set[str]] = defaultdict(set)
+            gids[first[0]].add(first[1])
+            while not changes.empty():
+                pid, gid = changes.get_nowait()
+                gids[pid].add(gid)
+
+            for pid, group in gids.items():
+                try:
+                    created, updated = GID.objects.sync_gids_from_instance(
+                        instances[pid], group
+                    )
+                except (OSError, Fault, ProtocolError, KeyError) as exc:
+                    logger.exception(exc)
+                    continue
+                self.stdout.write(
+                    f"[{len(group)}] GIDs notified by [{pid}]: "
+                    f"[{created}] created, [{updated}] updated."
+                )
@@ -0,0 +1,163 @@
+"""
+This command is going to record the resources used by the instances of aria2c in their
+time series
+
+The processes of all instances are sampled by one walk of /proc, and aria2.getGlobalStat
+of all instances is called concurrently, at each step of the finest archive.
+
+* https://aria2.github.io/manual/en/html/aria2c.html#aria2.getGlobalStat
+"""
+from __future__ import annotations
+
+import logging
+import math
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from aria2.models import Instance, ResourceSeries
+from aria2.process import TimeSeries
+
+logger = logging.getLogger(__name__)
+
+NAN = math.nan
+
+
+class Command(BaseCommand):
+    """
+    record the resources used by the instances of aria2c in their time series
+    """
+
+    help = "Record the resources used by the instances of aria2c in their time series"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+
+        :param parser:
+        :type parser: CommandParser
+        :return:
+        :rtype: None
+        """
+        parser.add_argument(
+            "--interval",
+            default=None,
+            help="the seconds between two samples, the step of the finest archive by "
+            "default",
+            type=float,
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        """
+
+        :param args:
+        :type args: Any
+        :param options:
+        :type options: Any
+        :return:
+        :rtype: Optional[str]
+        """
+        interval = options["interval"] or settings.ARIA2_SERIES_ARCHIVES[0][0]
+        series: dict[int, ResourceSeries] = {}
+        # the time, the bytes read and the bytes written of the last sample
+        counters: dict[int, tuple[float, Optional[int], Optional[int]]] = {}
+        try:
+            while True:
+                started = time.monotonic()
+                changed = self._sample(series, counters)
+                ResourceSeries.objects.bulk_update(changed, ("data", "updated_at"))
+                time.sleep(max(interval - (time.monotonic() - started), 0))
+        finally:
+            now = timezone.now()
+            for row in series.values():
+                row.data = row.series.to_bytes()
+                row.updated_at = now
+            ResourceSeries.objects.bulk_update(series.values(), ("data", "updated_at"))
+
+    def _load(self, series: dict[int, ResourceSeries], pids: set[int]) -> None:
+        """
+        load the time series of the new instances, created if not found, and forget
+        those of the instances gone
+        :param series:
+        :type series: dict[int, ResourceSeries]
+        :param pids:
+        :type pids: set[int]
+        :return:
+        :rtype: None
+        """
+        for pid in set(series).difference(pids):
+            del series[pid]
+        if not (missing := pids.difference(series)):
+            return
+        series.update(
+            (row.instance_id, row)
+            for row in ResourceSeries.objects.filter(instance__in=missing)
+        )
+        ResourceSeries.objects.bulk_create(
+            ResourceSeries(
+                instance_id=pid,
+                data=TimeSeries.create(settings.ARIA2_SERIES_ARCHIVES).to_bytes(),
+            )
+            for pid in missing.difference(series)
+        )
+        series.update(
+            (row.instance_id, row)
+            for row in ResourceSeries.objects.filter(
+                instance__in=missing.difference(series)
+            )
+        )
+
+    def _sample(
+        self,
+        series: dict[int, ResourceSeries],
+        counters: dict[int, tuple[float, Optional[int], Optional[int]]],
+    ) -> list[ResourceSeries]:
+        """
+        record a sample of each instance
+        :param series:
+        :type series: dict[int, ResourceSeries]
+        :param counters:
+        :type counters: dict[int, tuple[float, Optional[int], Optional[int]]]
+        :return: the time series with rows consolidated, to be saved
+        :rtype: list[ResourceSeries]
+        """
+        stats = Instance.objects.with_process().fan_out("aria2.getGlobalStat")
+        self._load(series, {instance.pk for instance in stats})
+        for pid in set(counters).difference(series):
+            del counters[pid]
+
+        now = time.time()
+        updated_at = timezone.now()
+        changed = []
+        for instance, stat in stats.items():
+            process = instance.process if instance.alive else None
+            read_speed = write_speed = NAN
+            if process is not None:
+                last = counters.get(instance.pk)
+                if last and None not in (*last[1:], process.read_bytes):
+                    elapsed = now - last[0]
+                    read_speed = (process.read_bytes - last[1]) / elapsed
+                    write_speed = (process.write_bytes - last[2]) / elapsed
+                counters[instance.pk] = (now, process.read_bytes, process.write_bytes)
+            if isinstance(stat, Exception):
+                logger.warning("Fail to get the statistics of %s: %s", instance, stat)
+                stat = {}
+
+            row = series[instance.pk]
+            if row.series.record(
+                now,
+                (
+                    process.cpu_percent if process else NAN,
+                    process.rss if process else NAN,
+                    read_speed,
+                    write_speed,
+                    float(stat.get("downloadSpeed", NAN)),
+                    float(stat.get("uploadSpeed", NAN)),
+                ),
+            ):
+                row.data = row.series.to_bytes()
+                row.updated_at = updated_at
+                changed.append(row)
+        return changed
@@ -0,0 +1,68 @@
+"""
+This command is going to shut down the instances of aria2c concurrently and delete them
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from aria2.models import Instance
+
+
+class Command(BaseCommand):
+    """
+    shut down the instances of aria2c concurrently and delete them
+    """
+
+    help = "Shut down the instances of aria2c concurrently and delete them"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+
+        :param parser:
+        :type parser: CommandParser
+        :return:
+        :rtype: None
+        """
+        parser.add_argument(
+            "pids",
+            help="the pids of the instances, all instances if not given",
+            nargs="*",
+            type=int,
+        )
+        parser.add_argument(
+            "--timeout",
+            default=None,
+            help="the seconds to wait for the instances to exit at each step",
+            type=float,
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        """
+
+        :param args:
+        :type args: Any
+        :param options:
+        :type options: Any
+        :return:
+        :rtype: Optional[str]
+        """
+        instances = Instance.objects.all()
+        if options["pids"]:
+            instances = instances.filter(pk__in=options["pids"])
+
+        pids = set(instances.values_list("pk", flat=True))
+        _, deleted = instances.delete(options["timeout"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"[{deleted.get(Instance._meta.label, 0)}] instances are deleted."
+            )
+        )
+        if running := sorted(
+            Instance.objects.filter(pk__in=pids).values_list("pk", flat=True)
+        ):
+            self.stderr.write(
+                self.style.ERROR(f"Instances still running are kept: {running}")
+            )
+        return None
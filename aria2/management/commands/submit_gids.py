@@ -0,0 +1,69 @@
+"""
+This command is going to submit the GID tasks not submitted yet to the instances of
+aria2c
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from aria2.models import GIDMetaLink, GIDTorrent, GIDUri
+
+
+class Command(BaseCommand):
+    """
+    submit the GID tasks not submitted yet to the instances of aria2c
+    """
+
+    help = "Submit the GID tasks not submitted yet to the instances of aria2c"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+
+        :param parser:
+        :type parser: CommandParser
+        :return:
+        :rtype: None
+        """
+        parser.add_argument(
+            "--chunk-size",
+            default=None,
+            help="the number of tasks submitted by one system.multicall",
+            type=int,
+        )
+        parser.add_argument(
+            "--interval",
+            default=0,
+            help="the seconds between two submissions, submit only once if 0",
+            type=float,
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        """
+
+        :param args:
+        :type args: Any
+        :param options:
+        :type options: Any
+        :return:
+        :rtype: Optional[str]
+        """
+        while True:
+            for model in (GIDUri, GIDTorrent, GIDMetaLink):
+                submitted, failures = model.objects.submit_pending(
+                    options["chunk_size"]
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"[{submitted}] {model._meta.verbose_name} tasks are submitted."
+                    )
+                )
+                for task, exc in failures.items():
+                    self.stderr.write(
+                        self.style.ERROR(f"Fail to submit [{task}]: {exc}")
+                    )
+            if not options["interval"]:
+                return None
+            time.sleep(options["interval"])
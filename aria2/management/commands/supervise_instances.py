@@ -0,0 +1,207 @@
+"""
+This command is going to keep the instances of aria2c alive, launching the dead ones
+again
+
+The exit of each instance is watched by a pidfd in the event loop, or found by /proc at
+each interval if pidfd is not supported.
+
+* https://man7.org/linux/man-pages/man2/pidfd_open.2.html
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from aria2.exceptions import CommandExecutionFailed
+from aria2.models import Binary, Instance
+from aria2.models.instance import is_running
+
+logger = logging.getLogger(__name__)
+
+
+def relaunch(pid: int, timeout: Optional[float]) -> Optional[Instance]:
+    """
+    launch the instance again if it is still in the database, dead and not being shut
+    down; a pid reused by another process counts as dead
+    :param pid:
+    :type pid: int
+    :param timeout:
+    :type timeout: Optional[float]
+    :return: the instance of the new pid, None if the instance is deleted
+    :rtype: Optional[Instance]
+    """
+    try:
+        instance = Instance.objects.select_related("profile").get(pk=pid)
+    except Instance.DoesNotExist:
+        return None
+    if instance.stopping:
+        return None
+    if not instance.alive:
+        instance.relaunch(timeout)
+    return instance
+
+
+class Command(BaseCommand):
+    """
+    keep the instances of aria2c alive, launching the dead ones again
+    """
+
+    help = "Keep the instances of aria2c alive, launching the dead ones again"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+
+        :param parser:
+        :type parser: CommandParser
+        :return:
+        :rtype: None
+        """
+        parser.add_argument(
+            "--interval",
+            default=5,
+            help="the seconds between two loads of the instances from the database",
+            type=float,
+        )
+        parser.add_argument(
+            "--backoff",
+            default=1,
+            help="the seconds to wait after the first failed launch, doubled after "
+            "each failure",
+            type=float,
+        )
+        parser.add_argument(
+            "--max-backoff",
+            default=60,
+            help="the maximum seconds to wait between two launches",
+            type=float,
+        )
+        parser.add_argument(
+            "--scan-binaries",
+            action="store_true",
+            help="sync the binaries of aria2c with the file system at each interval, "
+            "only the directories changed are scanned again",
+        )
+        parser.add_argument(
+            "--timeout",
+            default=None,
+            help="the seconds to wait for each instance to be ready",
+            type=float,
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        """
+
+        :param args:
+        :type args: Any
+        :param options:
+        :type options: Any
+        :return:
+        :rtype: Optional[str]
+        """
+        asyncio.run(self._supervise(options))
+        return None
+
+    async def _supervise(self, options: dict[str, Any]) -> None:
+        """
+
+        :param options:
+        :type options: dict[str, Any]
+        :return:
+        :rtype: None
+        """
+        loop = asyncio.get_running_loop()
+        # the pidfd of each instance watched
+        watches: dict[int, int] = {}
+        restarts: dict[int, asyncio.Task] = {}
+
+        def unwatch(pid: int) -> None:
+            fd = watches.pop(pid)
+            loop.remove_reader(fd)
+            os.close(fd)
+
+        def watch(pid: int, command: str) -> None:
+            try:
+                fd = os.pidfd_open(pid)
+            except ProcessLookupError:
+                restart(pid)
+                return
+            except (AttributeError, OSError):  # no pidfd, /proc at the next interval
+                if not is_running(pid, command):
+                    restart(pid)
+                return
+            # checked after the pidfd is opened, so the pidfd is of the same process
+            if not is_running(pid, command):  # the pid is reused by another process
+                os.close(fd)
+                restart(pid)
+                return
+            watches[pid] = fd
+            loop.add_reader(fd, exited, pid)
+
+        def exited(pid: int) -> None:
+            unwatch(pid)
+            restart(pid)
+
+        def restart(pid: int) -> None:
+            if pid in restarts:
+                return
+            restarts[pid] = loop.create_task(self._restart(pid, options, watch))
+            restarts[pid].add_done_callback(lambda _: restarts.pop(pid, None))
+
+        while True:
+            if options["scan_binaries"]:
+                await asyncio.to_thread(Binary.objects.create_from_file_system, True)
+            commands = dict(
+                await asyncio.to_thread(
+                    lambda: list(
+                        Instance.objects.filter(stopping=False).values_list(
+                            "pk", "command"
+                        )
+                    )
+                )
+            )
+            for pid in set(watches).difference(commands):
+                unwatch(pid)
+            for pid in set(commands).difference(watches).difference(restarts):
+                watch(pid, commands[pid])
+            await asyncio.sleep(options["interval"])
+
+    async def _restart(
+        self, pid: int, options: dict[str, Any], watch: Callable[[int, str], None]
+    ) -> None:
+        """
+        launch the instance again until succeeded, waiting longer after each failure
+        :param pid:
+        :type pid: int
+        :param options:
+        :type options: dict[str, Any]
+        :param watch: the callback to watch the new pid
+        :type watch: Callable[[int, str], None]
+        :return:
+        :rtype: None
+        """
+        delay = options["backoff"]
+        while True:
+            try:
+                instance = await asyncio.to_thread(relaunch, pid, options["timeout"])
+            except (CommandExecutionFailed, OSError) as exc:
+                logger.error("Fail to launch [%s] again: %s", pid, exc)
+                self.stderr.write(
+                    self.style.ERROR(f"Fail to launch [{pid}] again: {exc}")
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, options["max_backoff"])
+                continue
+            if instance is None:
+                return
+            if instance.pid != pid:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Instance [{pid}] is launched again: [{instance.pid}]"
+                    )
+                )
+            watch(instance.pid, instance.command)
+            return
@@ -0,0 +1,53 @@
+"""
+This command is going to mirror the status of GIDs from the instances of aria2c
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from aria2.models import GID
+
+
+class Command(BaseCommand):
+    """
+    mirror the status of GIDs from the instances of aria2c
+    """
+
+    help = "Mirror the status of GIDs from the instances of aria2c"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+
+        :param parser:
+        :type parser: CommandParser
+        :return:
+        :rtype: None
+        """
+        parser.add_argument(
+            "--interval",
+            default=0,
+            help="the seconds between two cycles, sync only once if 0",
+            type=float,
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        """
+
+        :param args:
+        :type args: Any
+        :param options:
+        :type options: Any
+        :return:
+        :rtype: Optional[str]
+        """
+        while True:
+            created, updated = GID.objects.sync()
+            self.stdout.write(
+                self.style.SUCCESS(f"[{created}] GIDs created, [{updated}] updated.")
+            )
+            if not options["interval"]:
+                return None
+            time.sleep(options["interval"])
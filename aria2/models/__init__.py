@@ -6,3 +6,4 @@ from .binary import Binary
 from .gid import GID, GIDMetaLink, GIDTorrent, GIDUri
 from .instance import Instance
 from .profile import ArgumentPair, Profile
+from .series import ResourceSeries
@@ -5,11 +5,10 @@ from __future__ import annotations
 
 import logging
 import re
-import subprocess
 from typing import TYPE_CHECKING
 
 from django.apps import apps
-from django.db import models
+from django.db import models, transaction
 
 if TYPE_CHECKING:
     from ..binary import Binary
@@ -22,7 +21,7 @@ beginning_regex = re.compile(
         ^\s
         ((?P<short_argument>-\S+?)(,\s)?)?
         (?P<long_argument>--\S+?)
-        (\[?=\S+?]?)?
+        (\[?=(?P<placeholder>\S+?)]?)?
         \s+
         (?P<description>.+)$
     """,
@@ -38,6 +37,32 @@ category_regex = re.compile(
 )
 
 
+def parse_help(text: str) -> list[tuple[dict[str, str], list[str]]]:
+    """
+    parse the output of aria2c --help=#all into the fields and the tags of each argument
+    :param text:
+    :type text: str
+    :return:
+    :rtype: list[tuple[dict[str, str], list[str]]]
+    """
+    records: list[tuple[dict[str, str], list[str]]] = []
+    line: str
+    for line in filter(None, text.split("\n")[3:-3]):
+        if m := beginning_regex.match(line):
+            records.append((m.groupdict(), []))
+            continue
+        fields, tags = records[-1]
+        if m := category_regex.match(line):
+            key, value = m.groupdict()["key"], m.groupdict()["value"]
+            if key == "Tags":
+                tags.extend(value.split(", "))
+            else:
+                fields[key.lower().replace(" ", "_")] = value.replace("#", "")
+            continue
+        fields["description"] = " ".join((fields["description"], line.strip()))
+    return records
+
+
 class QuerySet(models.QuerySet):
     """
     custom QuerySet to fit Aria2 Argument
@@ -45,43 +70,47 @@ class QuerySet(models.QuerySet):
 
     def create_from_binary(self, binary: Binary) -> QuerySet:
         """
-
+        the arguments are created from the catalog cached in the binary, only if they
+        are not created from the current content of the binary yet; the
+        arguments, the tags and the relations between them are written in bulk within
+        one transaction; the arguments of a missing binary are kept as they are
         :param binary:
         :type binary: Binary
         :return:
         :rtype: QuerySet
         """
-        self.filter(binary=binary).delete()
+        if binary.missing:
+            return self.filter(binary=binary)
+        binary.refresh_fingerprint()
+        if (
+            binary.arguments_sha256 == binary.sha256
+            and self.filter(binary=binary).exists()
+        ):
+            return self.filter(binary=binary)
+        records = binary.catalog
 
         ArgumentTag: TAria2cArgumentTag = apps.get_model("aria2", "ArgumentTag")
-
-        argument: Argument = None
-        line: str
-        for line in filter(
-            None,
-            subprocess.check_output([binary.path, "--help=#all"])
-            .decode()
-            .split("\n")[3:-3],
-        ):
-            if m := beginning_regex.match(line):
-                if argument:
-                    argument.save()
-                argument = self.create(binary=binary, **m.groupdict())
-                continue
-            if m := category_regex.match(line):
-                key, value = m.groupdict()["key"], m.groupdict()["value"]
-                if key != "Tags":
-                    setattr(
-                        argument,
-                        key.lower().replace(" ", "_"),
-                        value.replace("#", ""),
-                    )
-                    continue
-                for i in value.split(", "):  # tags
-                    argument.tags.add(ArgumentTag.objects.get_or_create(value=i)[0])
-                continue
-            argument.description = " ".join((argument.description, line.strip()))
-        argument.save()
+        Through = self.model.tags.through
+
+        with transaction.atomic():
+            self.filter(binary=binary).delete()
+            arguments = self.bulk_create(
+                self.model(binary=binary, **fields) for fields, _ in records
+            )
+            ArgumentTag.objects.bulk_create(
+                (
+                    ArgumentTag(value=value)
+                    for value in sorted({tag for _, tags in records for tag in tags})
+                ),
+                ignore_conflicts=True,
+            )
+            Through.objects.bulk_create(
+                Through(argument_id=argument.pk, argumenttag_id=tag)
+                for argument, (_, tags) in zip(arguments, records)
+                for tag in dict.fromkeys(tags)
+            )
+            binary.arguments_sha256 = binary.sha256
+            binary.save(update_fields=["arguments_sha256"])
         return self.filter(binary=binary)
 
 
@@ -100,6 +129,8 @@ class Argument(models.Model):
     description = models.CharField(max_length=256)
     possible_values = models.CharField(blank=True, max_length=256, null=True)
     default = models.CharField(blank=True, max_length=256, null=True)
+    # the name of the value in the help text, like SIZE or PORT...
+    placeholder = models.CharField(blank=True, max_length=256, null=True)
     tags = models.ManyToManyField("ArgumentTag")
 
     binary = models.ForeignKey("Binary", on_delete=models.CASCADE)
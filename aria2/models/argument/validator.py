@@ -0,0 +1,206 @@
+"""
+The validator of the options of aria2c, compiled from the argument catalog of a binary
+
+The possible values in the output of aria2c --help=#all are compiled into one check for
+each argument: the enums like "true, false", the numeric ranges like "1-*" or "0.0-*",
+and the sizes like "1048576-1073741824" accepting the suffixes K and M. The arguments
+with free values, like "/path/to/directory", are not checked. The options are checked
+locally before they are sent by RPC or given to a new process.
+
+* https://aria2.github.io/manual/en/html/aria2c.html#options
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+from ...exceptions import InvalidOption
+
+# the check of a value, returning the error or None
+Check = Callable[[str], Optional[str]]
+
+enum_regex = re.compile(r"^[\w.-]+$")
+range_regex = re.compile(
+    r"^(?P<minimum>\d+(\.\d+)?[KkMm]?|\*)-(?P<maximum>\d+(\.\d+)?[KkMm]?|\*)$"
+)
+size_regex = re.compile(r"^(?P<number>\d+)(?P<unit>[KkMm]?)$")
+
+SIZE_PLACEHOLDERS = frozenset(("SIZE", "SPEED", "LENGTH"))
+UNITS = {"": 1, "k": 1024, "m": 1024 * 1024}
+
+
+def parse_size(value: str) -> Optional[int]:
+    """
+    the bytes of the size like 1048576, 1024K or 1M, None if invalid
+    :param value:
+    :type value: str
+    :return:
+    :rtype: Optional[int]
+    """
+    if not (m := size_regex.match(value)):
+        return None
+    return int(m["number"]) * UNITS[m["unit"].lower()]
+
+
+def parse_number(value: str, fraction: bool) -> Optional[float]:
+    """
+    the number of the value, None if invalid
+    :param value:
+    :type value: str
+    :param fraction: whether a fraction like 1.5 is allowed
+    :type fraction: bool
+    :return:
+    :rtype: Optional[float]
+    """
+    try:
+        return float(value) if fraction else int(value)
+    except ValueError:
+        return None
+
+
+def compile_enum(values: Iterable[str]) -> Check:
+    """
+
+    :param values:
+    :type values: Iterable[str]
+    :return:
+    :rtype: Check
+    """
+    values = frozenset(values)
+    message = f"must be one of {', '.join(sorted(values))}"
+
+    def check(value: str) -> Optional[str]:
+        return None if value in values else message
+
+    return check
+
+
+def compile_range(minimum: str, maximum: str, size: bool, repeated: bool) -> Check:
+    """
+
+    :param minimum: the number, or * for no limit
+    :type minimum: str
+    :param maximum: the number, or * for no limit
+    :type maximum: str
+    :param size: whether the suffixes K and M are allowed
+    :type size: bool
+    :param repeated: whether the value is a list of numbers and ranges, like the ports
+    6881-6889,6999
+    :type repeated: bool
+    :return:
+    :rtype: Check
+    """
+    size = size or any(bound[-1:].isalpha() for bound in (minimum, maximum))
+    fraction = not size and "." in minimum + maximum
+
+    def parse(value: str) -> Optional[float]:
+        return parse_size(value) if size else parse_number(value, fraction)
+
+    low = None if minimum == "*" else parse(minimum)
+    high = None if maximum == "*" else parse(maximum)
+    message = f"must be in the range {minimum}-{maximum}"
+
+    def check_number(value: str) -> Optional[str]:
+        if (number := parse(value)) is None:
+            return "must be a size" if size else "must be a number"
+        if (low is not None and number < low) or (high is not None and number > high):
+            return message
+        return None
+
+    if not repeated:
+        return check_number
+
+    def check(value: str) -> Optional[str]:
+        for item in value.split(","):
+            for number in item.split("-", maxsplit=1):
+                if error := check_number(number):
+                    return error
+        return None
+
+    return check
+
+
+def compile_argument(fields: Mapping[str, Optional[str]]) -> Optional[Check]:
+    """
+    the check of an argument in the catalog, None if its values are free
+    :param fields:
+    :type fields: Mapping[str, Optional[str]]
+    :return:
+    :rtype: Optional[Check]
+    """
+    placeholder = fields.get("placeholder") or ""
+    size = placeholder.rstrip(".") in SIZE_PLACEHOLDERS
+    if not (possible_values := fields.get("possible_values")):
+        if size:
+            return compile_range("*", "*", size, placeholder.endswith("..."))
+        return None
+    if m := range_regex.match(possible_values):
+        return compile_range(
+            m["minimum"], m["maximum"], size, placeholder.endswith("...")
+        )
+    values = possible_values.split(", ")
+    if all(enum_regex.match(value) for value in values):
+        return compile_enum(values)
+    return None
+
+
+class OptionValidator:
+    """
+    the checks of the arguments of a binary, by their long names
+    """
+
+    def __init__(self, checks: Mapping[str, Optional[Check]]) -> None:
+        """
+
+        :param checks: None for the arguments with free values
+        :type checks: Mapping[str, Optional[Check]]
+        """
+        self.checks = dict(checks)
+
+    @classmethod
+    def compile(
+        cls, catalog: Iterable[tuple[Mapping[str, Optional[str]], Iterable[str]]]
+    ) -> OptionValidator:
+        """
+
+        :param catalog: the fields and the tags of each argument
+        :type catalog: Iterable[tuple[Mapping[str, Optional[str]], Iterable[str]]]
+        :return:
+        :rtype: OptionValidator
+        """
+        return cls(
+            {fields["long_argument"]: compile_argument(fields) for fields, _ in catalog}
+        )
+
+    def get_errors(self, options: Mapping[str, Any]) -> dict[str, str]:
+        """
+        the errors of the options, nothing is checked if the catalog is empty
+        :param options: the names with or without the leading --
+        :type options: Mapping[str, Any]
+        :return:
+        :rtype: dict[str, str]
+        """
+        if not self.checks:
+            return {}
+        errors: dict[str, str] = {}
+        for name, value in options.items():
+            argument = name if name.startswith("--") else f"--{name}"
+            if argument not in self.checks:
+                errors[name] = "is not an option of aria2c"
+            elif (check := self.checks[argument]) and (error := check(str(value))):
+                errors[name] = f"{error}, got {value!r}"
+        return errors
+
+    def validate(self, options: Mapping[str, Any]) -> None:
+        """
+
+        :param options: the names with or without the leading --
+        :type options: Mapping[str, Any]
+        :return:
+        :rtype: None
+        :raise InvalidOption: any of the options is invalid
+        """
+        if errors := self.get_errors(options):
+            raise InvalidOption(
+                "; ".join(f"{name} {error}" for name, error in errors.items())
+            )
@@ -3,22 +3,39 @@ The model of Aria2
 """
 from __future__ import annotations
 
+import hashlib
 import logging
+import os
 import pprint
 import subprocess
+import threading
+from collections import defaultdict
 from pathlib import Path
-from typing import Optional, TypeVar
+from typing import Iterable, Optional, TypeVar
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.db.backends.base.base import BaseDatabaseWrapper
 from django.db.models.expressions import Col
 
 from ..exceptions import CommandNotFound
+from ..process import get_index, read_argv
+from .argument.argument import parse_help
+from .argument.validator import OptionValidator
 
 _T = TypeVar("_T", bound=BaseDatabaseWrapper)
 
 logger = logging.getLogger("django")
 
+BINARY_NAME = "aria2c"
+
+# the mtime of each directory scanned, and the real path of aria2c found in it
+_directories: dict[str, tuple[Optional[int], Optional[str]]] = {}
+_lock = threading.Lock()
+
+# the validators compiled from the catalogs, by the sha256 of the binaries
+_validators: dict[Optional[str], OptionValidator] = {}
+
 
 class PathField(models.CharField):
     """
@@ -46,43 +63,165 @@ class PathField(models.CharField):
         return Path(value)
 
 
+def scan_directories(
+    directories: Iterable[str], incremental: bool = False
+) -> Optional[tuple[str, ...]]:
+    """
+    find aria2c in the directories, the symbolic links are resolved and the same file
+    found by many paths is kept once
+    :param directories:
+    :type directories: Iterable[str]
+    :param incremental: only the directories whose mtime is changed since the last scan
+    are read again, and None is returned if none of them is changed
+    :type incremental: bool
+    :return: the real paths of the binaries found, in the order of the directories
+    :rtype: Optional[tuple[str, ...]]
+    """
+    directories = tuple(dict.fromkeys(directories))
+    with _lock:
+        changed = not incremental or set(directories) != set(_directories)
+        for directory in set(_directories).difference(directories):
+            del _directories[directory]
+        for directory in directories:
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            if incremental and _directories.get(directory, (-1,))[0] == mtime_ns:
+                continue
+            changed = True
+            path = os.path.join(directory, BINARY_NAME)
+            _directories[directory] = (
+                mtime_ns,
+                os.path.realpath(path)
+                if mtime_ns is not None
+                and os.path.isfile(path)
+                and os.access(path, os.X_OK)
+                else None,
+            )
+        if not changed:
+            return None
+        found = tuple(_directories[directory][1] for directory in directories)
+
+    paths: dict[tuple[int, int], str] = {}
+    for path in filter(None, found):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        paths.setdefault((stat.st_dev, stat.st_ino), path)
+    return tuple(paths.values())
+
+
 class QuerySet(models.QuerySet):
     """
     custom QuerySet to fit the local file system
     """
 
-    def create_from_file_system(self) -> QuerySet:
+    def create_from_file_system(self, incremental: bool = False) -> QuerySet:
         """
-
+        sync the binaries with those found in $PATH and settings.ARIA2_BINARY_DIRS, the
+        rows are created, updated, merged and deleted within one transaction; the
+        binaries not found but still used by any profile or instance are only marked
+        missing
+        :param incremental: only the directories whose mtime is changed are scanned
+        again, and nothing is synced if none of them is changed
+        :type incremental: bool
         :return:
         :rtype: QuerySet
         """
-        paths = set(
-            subprocess.check_output(["which", "--all", "aria2c"])
-            .decode()
-            .strip()
-            .split("\n")
-        )
-        paths_in_database = set(
-            str(path) for path in self.values_list("path", flat=True)
+        paths = scan_directories(
+            (
+                *filter(None, os.environ.get("PATH", "").split(os.pathsep)),
+                *map(str, settings.ARIA2_BINARY_DIRS),
+            ),
+            incremental,
         )
+        if paths is None:
+            return self.all()
 
-        self.filter(path__in=paths_in_database.difference(paths))
+        created: list[str] = []
+        updated: list[str] = []
+        merged: list[str] = []
+        missing: list[str] = []
+        deleted: list[str] = []
+        with transaction.atomic():
+            groups: dict[str, list[Binary]] = defaultdict(list)
+            for binary in self.select_for_update().order_by("pk"):
+                groups[os.path.realpath(binary.path)].append(binary)
+
+            stale: list[int] = []
+            for path, (binary, *duplicates) in groups.items():
+                for duplicate in duplicates:
+                    merged.append(f"{duplicate.path} -> {binary.path}")
+                    binary.merge(duplicate)
+                fields = {"missing": path not in paths}
+                if path in paths and str(binary.path) != path:
+                    updated.append(f"{binary.path} -> {path}")
+                    fields["path"] = Path(path)
+                elif fields["missing"]:
+                    # the profiles and the instances of a binary are never removed by
+                    # a scan, which may run with a shorter $PATH
+                    if binary.profile_set.exists() or binary.instance_set.exists():
+                        if not binary.missing:
+                            missing.append(str(binary.path))
+                    else:
+                        deleted.append(str(binary.path))
+                        stale.append(binary.pk)
+                        continue
+                if any(getattr(binary, k) != v for k, v in fields.items()):
+                    for key, value in fields.items():
+                        setattr(binary, key, value)
+                    binary.save(update_fields=list(fields))
+            self.filter(pk__in=stale).delete()
+            created.extend(path for path in paths if path not in groups)
+            self.bulk_create(self.model(path=Path(path)) for path in created)
         logger.info(
-            "The paths existed in the database but not in $PATH are removed:\n%s",
-            pprint.pformat(sorted(list(paths_in_database.difference(paths)))),
+            "The binaries not found in the file system and not used are removed:\n%s",
+            pprint.pformat(deleted),
         )
-
-        for path in paths.difference(paths_in_database):
-            self.create(path=path)
+        if missing:
+            logger.warning(
+                "The binaries not found in the file system but used are missing:\n%s",
+                pprint.pformat(missing),
+            )
         logger.info(
-            "The paths existed in $PATH but not in the database are created:\n%s",
-            pprint.pformat(sorted(list(paths.difference(paths_in_database)))),
+            "The binaries of the same file are merged:\n%s", pprint.pformat(merged)
         )
+        logger.info(
+            "The binaries with the symbolic links resolved are updated:\n%s",
+            pprint.pformat(updated),
+        )
+        logger.info(
+            "The binaries found in the file system are created:\n%s",
+            pprint.pformat(created),
+        )
+
+        for binary in self.filter(missing=False):
+            try:
+                binary.refresh_fingerprint()
+            except (OSError, subprocess.CalledProcessError) as exc:
+                logger.error("Fail to read the binary [%s]: %s", binary, exc)
 
         return self.all()
 
 
+def parse_version(text: str) -> tuple[str, list[str]]:
+    """
+    parse the output of aria2c --version into the version and the enabled features
+    :param text:
+    :type text: str
+    :return:
+    :rtype: tuple[str, list[str]]
+    """
+    version = text.split("\n", maxsplit=1)[0].replace("aria2 version ", "")
+    features: list[str] = []
+    for line in text.split("\n"):
+        if line.startswith("Enabled Features: "):
+            features = line.removeprefix("Enabled Features: ").split(", ")
+    return version, features
+
+
 Manager = models.Manager.from_queryset(QuerySet)
 
 
@@ -93,6 +232,22 @@ class Binary(models.Model):
 
     path = PathField(max_length=256)
 
+    # the fingerprint of the executable, the cached fields below are parsed from it
+    inode = models.PositiveBigIntegerField(blank=True, null=True)
+    size = models.PositiveBigIntegerField(blank=True, null=True)
+    mtime_ns = models.PositiveBigIntegerField(blank=True, null=True)
+    sha256 = models.CharField(blank=True, max_length=64, null=True)
+
+    version = models.CharField(blank=True, max_length=256, null=True)
+    verbose_version = models.TextField(blank=True, null=True)
+    features = models.JSONField(blank=True, default=list)
+    # the fields and the tags of each argument in the output of --help=#all
+    catalog = models.JSONField(blank=True, default=list)
+    # the sha256 of the content which the arguments are created from
+    arguments_sha256 = models.CharField(blank=True, max_length=64, null=True)
+    # not found in the file system by the last scan, but still used
+    missing = models.BooleanField(default=False)
+
     objects = Manager()
 
     class Meta:
@@ -113,42 +268,129 @@ class Binary(models.Model):
         :return:
         :rtype: tuple[int, ...]
         """
+        return get_index(settings.ARIA2_PROCESS_INDEX_TTL).get_pids(self.path)
+
+    @staticmethod
+    def get_argv(pid: int | str) -> tuple[str, ...]:
+        """
+        the argv of the process, read again if the process is not in the index yet
+        :param pid:
+        :type pid: int | str
+        :return:
+        :rtype: tuple[str, ...]
+        :raise ProcessLookupError: the process does not exist
+        """
         try:
-            return tuple(
-                int(pid)
-                for pid in subprocess.check_output(["pidof", str(self.path)])
-                .decode()
-                .split()
-            )
-        except subprocess.CalledProcessError:
-            return tuple()
+            return get_index(settings.ARIA2_PROCESS_INDEX_TTL).argv[int(pid)]
+        except KeyError:
+            return read_argv(int(pid))
 
     @staticmethod
     def get_command(pid: int | str) -> str:
         """
 
         :param pid:
-        :type pid: int
+        :type pid: int | str
         :return:
-        :rtype: int | str
+        :rtype: str
         """
-        return (
-            subprocess.check_output(
-                ["ps", "-p", str(pid), "-o", "args", "--no-headers"]
-            )
-            .decode()
-            .strip()
-        )
+        return " ".join(Binary.get_argv(pid))
 
-    def get_pid(self, command: str) -> int:
+    def get_pid(self, argv: Iterable[str]) -> int:
         """
-
-        :param command:
-        :type command: str
+        the pid of the process of this binary running exactly the argv
+        :param argv:
+        :type argv: Iterable[str]
         :return:
         :rtype: int
         """
-        for pid in self.get_pids():
-            if command == self.get_command(pid):
-                return pid
-        raise CommandNotFound
+        pid = get_index(settings.ARIA2_PROCESS_INDEX_TTL).get_pid(argv)
+        if pid is None or pid not in self.get_pids():
+            raise CommandNotFound
+        return pid
+
+    def merge(self, duplicate: Binary) -> None:
+        """
+        move everything of the duplicate of the same file to this binary, and delete the
+        duplicate
+        :param duplicate:
+        :type duplicate: Binary
+        :return:
+        :rtype: None
+        """
+        for relation in self._meta.related_objects:
+            relation.related_model._base_manager.filter(
+                **{relation.field.name: duplicate}
+            ).update(**{relation.field.name: self})
+        duplicate.delete()
+
+    @staticmethod
+    def get_sha256(path: str | os.PathLike) -> str:
+        """
+
+        :param path:
+        :type path: str | os.PathLike
+        :return:
+        :rtype: str
+        """
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as file:
+            while chunk := file.read(1 << 20):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def refresh_fingerprint(self) -> bool:
+        """
+        stat the executable, and run it again for the version, the features and the
+        arguments only if its content is changed; the content is hashed only if the
+        inode, the size or the mtime is changed
+        :return: whether the content is changed
+        :rtype: bool
+        :raise OSError: the executable is not found
+        """
+        stat = os.stat(self.path)
+        if (self.inode, self.size, self.mtime_ns) == (
+            stat.st_ino,
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            return False
+        self.inode, self.size, self.mtime_ns = (
+            stat.st_ino,
+            stat.st_size,
+            stat.st_mtime_ns,
+        )
+        fields = ["inode", "size", "mtime_ns"]
+
+        if changed := (sha256 := self.get_sha256(self.path)) != self.sha256:
+            self.sha256 = sha256
+            self.verbose_version = subprocess.check_output(
+                [self.path, "--version"]
+            ).decode()
+            self.version, self.features = parse_version(self.verbose_version)
+            self.catalog = parse_help(
+                subprocess.check_output([self.path, "--help=#all"]).decode()
+            )
+            fields.extend(
+                ("sha256", "version", "verbose_version", "features", "catalog")
+            )
+            logger.info("The fingerprint of the binary [%s] is changed", self)
+
+        if self.pk:
+            self.save(update_fields=fields)
+        else:
+            self.save()
+        return changed
+
+    @property
+    def validator(self) -> OptionValidator:
+        """
+        the validator compiled from the catalog once for each content of the binary
+        :return:
+        :rtype: OptionValidator
+        """
+        if (validator := _validators.get(self.sha256)) is None:
+            validator = _validators[self.sha256] = OptionValidator.compile(
+                self.catalog if self.sha256 else ()
+            )
+        return validator
@@ -10,14 +10,216 @@ from __future__ import annotations
 
 import logging
 import pprint
-from typing import Any
+import secrets
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+from xmlrpc.client import Fault, ProtocolError
 
-from django.db import models
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.utils import timezone
 
 from ..utils import TimeStampMixin
 
+if TYPE_CHECKING:
+    from ..instance import Instance as TInstance
+
 logger = logging.getLogger(__name__)
 
+# the keys of the status of aria2 mirrored into the columns of GID
+STATUS_FIELDS: dict[str, tuple[str, Callable[[str], Any]]] = {
+    "status": ("status", str),
+    "totalLength": ("total_length", int),
+    "completedLength": ("completed_length", int),
+    "downloadSpeed": ("download_speed", int),
+    "uploadSpeed": ("upload_speed", int),
+    "dir": ("dir", str),
+}
+
+
+def get_status_cache_key(session_id: str, gid: str) -> str:
+    """
+    the key of the status snapshot, which changes with the session of the instance
+    :param session_id:
+    :type session_id: str
+    :param gid:
+    :type gid: str
+    :return:
+    :rtype: str
+    """
+    return f"aria2:gid:{session_id}:{gid}"
+
+
+class QuerySet(models.QuerySet):
+    """
+    custom QuerySet to fit Aria2 GID
+    """
+
+    def allocate(self, instance: TInstance, count: int = 1) -> list[GID]:
+        """
+        reserve the GIDs for the downloads to submit to the instance: random non-zero
+        hex strings of 16 characters, used neither in the table nor in the instance;
+        the downloads are then submitted with the option gid, so that the submission
+        can be retried without adding the same download twice
+        :param instance:
+        :type instance: Instance
+        :param count:
+        :type count: int
+        :return:
+        :rtype: list[GID]
+        """
+        allocated: list[GID] = []
+        while len(allocated) < count:
+            candidates: set[str] = set()
+            while len(candidates) < count - len(allocated):
+                if (value := secrets.token_hex(8)) != "0" * 16:
+                    candidates.add(value)
+            candidates.difference_update(
+                self.filter(gid__in=candidates).values_list("gid", flat=True)
+            )
+            values = tuple(candidates)
+            results = instance.rpc_server_proxy.system.multicall(
+                [
+                    {"methodName": "aria2.tellStatus", "params": [value, ["gid"]]}
+                    for value in values
+                ]
+            )
+            allocated.extend(
+                self.bulk_create(
+                    self.model(gid=value, instance=instance)
+                    for value, result in zip(values, results)
+                    if isinstance(result, dict)  # the fault struct: GID is not found
+                )
+            )
+        return allocated
+
+    def sync_from_instance(self, instance: TInstance) -> tuple[int, int]:
+        """
+        mirror the downloads of the instance into the status columns: page through
+        aria2.tellActive, aria2.tellWaiting and aria2.tellStopped with only the keys of
+        the columns
+        :param instance:
+        :type instance: Instance
+        :return: the numbers of the created and the updated GIDs
+        :rtype: tuple[int, int]
+        """
+        keys = ["gid", *STATUS_FIELDS]
+        page_size = settings.ARIA2_GID_SYNC_PAGE_SIZE
+        statuses: dict[str, dict[str, str]] = {}
+
+        calls: list[dict[str, Any]] = [
+            {"methodName": "aria2.tellActive", "params": [keys]},
+            {"methodName": "aria2.tellWaiting", "params": [0, page_size, keys]},
+            {"methodName": "aria2.tellStopped", "params": [0, page_size, keys]},
+        ]
+        while calls:
+            results = instance.rpc_server_proxy.system.multicall(calls)
+            next_calls = []
+            for call, result in zip(calls, results):
+                if isinstance(result, dict):  # the fault struct of this call
+                    raise Fault(result["faultCode"], result["faultString"])
+                statuses.update((status["gid"], status) for status in result[0])
+                if call["methodName"] != "aria2.tellActive" and (
+                    len(result[0]) == page_size
+                ):
+                    offset = call["params"][0] + page_size
+                    next_calls.append(
+                        {
+                            "methodName": call["methodName"],
+                            "params": [offset, page_size, keys],
+                        }
+                    )
+            calls = next_calls
+
+        return self._write_statuses(instance, statuses)
+
+    def sync_gids_from_instance(
+        self, instance: TInstance, gids: Iterable[str]
+    ) -> tuple[int, int]:
+        """
+        mirror only the given downloads of the instance into the status columns with
+        one system.multicall of aria2.tellStatus, e.g. the GIDs notified by aria2
+        :param instance:
+        :type instance: Instance
+        :param gids:
+        :type gids: Iterable[str]
+        :return: the numbers of the created and the updated GIDs
+        :rtype: tuple[int, int]
+        """
+        keys = ["gid", *STATUS_FIELDS]
+        gids = tuple(gids)
+        results = instance.rpc_server_proxy.system.multicall(
+            [{"methodName": "aria2.tellStatus", "params": [gid, keys]} for gid in gids]
+        )
+        statuses: dict[str, dict[str, str]] = {}
+        for gid, result in zip(gids, results):
+            if isinstance(result, dict):  # the fault struct of this call
+                logger.warning("Fail to fetch the status of %s: %s", gid, result)
+                continue
+            statuses[gid] = result[0]
+        cache.delete_many(
+            get_status_cache_key(instance.session_id, gid) for gid in gids
+        )
+        return self._write_statuses(instance, statuses)
+
+    def _write_statuses(
+        self, instance: TInstance, statuses: dict[str, dict[str, str]]
+    ) -> tuple[int, int]:
+        """
+        write the new and the changed rows in one transaction
+        :param instance:
+        :type instance: Instance
+        :param statuses:
+        :type statuses: dict[str, dict[str, str]]
+        :return: the numbers of the created and the updated GIDs
+        :rtype: tuple[int, int]
+        """
+        now = timezone.now()
+        gids = self.in_bulk(statuses)
+        created: list[GID] = []
+        updated: list[GID] = []
+        for gid, status in statuses.items():
+            try:
+                obj = gids[gid]
+            except KeyError:
+                obj = self.model(gid=gid, instance=instance)
+                obj.apply_status(status)
+                created.append(obj)
+                continue
+            if obj.apply_status(status):
+                obj.updated_at = now
+                updated.append(obj)
+
+        with transaction.atomic():
+            self.bulk_create(created)
+            self.bulk_update(
+                updated,
+                (*(field for field, _ in STATUS_FIELDS.values()), "updated_at"),
+            )
+        return len(created), len(updated)
+
+    def sync(self) -> tuple[int, int]:
+        """
+        mirror the downloads of all instances into the status columns
+        :return: the numbers of the created and the updated GIDs
+        :rtype: tuple[int, int]
+        """
+        Instance: TInstance = apps.get_model("aria2", "Instance")
+        total_created = total_updated = 0
+        for instance in Instance.objects.all():
+            try:
+                created, updated = self.sync_from_instance(instance)
+            except (OSError, Fault, ProtocolError) as exc:
+                logger.exception(exc)
+                continue
+            total_created += created
+            total_updated += updated
+        return total_created, total_updated
+
+
+Manager = models.Manager.from_queryset(QuerySet)
+
 
 class GID(TimeStampMixin):
     """
@@ -27,59 +229,122 @@ class GID(TimeStampMixin):
     gid = models.CharField(max_length=16, primary_key=True)
     instance = models.ForeignKey("Instance", on_delete=models.CASCADE)
 
+    status = models.CharField(blank=True, max_length=16, null=True)
+    total_length = models.BigIntegerField(blank=True, null=True)
+    completed_length = models.BigIntegerField(blank=True, null=True)
+    download_speed = models.BigIntegerField(blank=True, null=True)
+    upload_speed = models.BigIntegerField(blank=True, null=True)
+    dir = models.CharField(blank=True, max_length=4096, null=True)
+
+    objects = Manager()
+
+    status_snapshot: dict[str, Any]
+
     class Meta:
         verbose_name = "GID"
 
     @property
-    def status(self) -> str:
+    def status_cache_key(self) -> str:
         """
 
         :return:
         :rtype: str
         """
-        return self._verbose_status["status"]
+        return get_status_cache_key(self.instance.session_id, self.gid)
 
     @property
     def _verbose_status(self) -> dict[str, Any]:
         """
-
+        the status snapshot is fetched once per object, and shared between objects of
+        the same GID for ARIA2_GID_STATUS_TTL seconds
         :return:
         :rtype: dict[str, Any]
         """
-        return self.instance.rpc_server_proxy.aria2.tellStatus(self.gid)
+        try:
+            return self.status_snapshot
+        except AttributeError:
+            pass
+        status = cache.get(self.status_cache_key)
+        if status is None:
+            status = self.instance.rpc_server_proxy.aria2.tellStatus(self.gid)
+            cache.set(self.status_cache_key, status, settings.ARIA2_GID_STATUS_TTL)
+        self.status_snapshot = status
+        return status
 
-    @property
-    def verbose_status(self) -> str:
+    def apply_status(self, status: dict[str, str]) -> bool:
         """
+        set the status columns from the status returned by aria2
+        :param status:
+        :type status: dict[str, str]
+        :return: whether any column is changed
+        :rtype: bool
+        """
+        changed = False
+        for key, (field, convert) in STATUS_FIELDS.items():
+            if key not in status:
+                continue
+            value = convert(status[key])
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                changed = True
+        return changed
 
+    def invalidate_status(self) -> None:
+        """
+        drop the status snapshot, e.g. after the download is paused, unpaused or removed
         :return:
-        :rtype: str
+        :rtype: None
         """
-        return pprint.pformat(self._verbose_status)
+        self.__dict__.pop("status_snapshot", None)
+        cache.delete(self.status_cache_key)
 
-    @property
-    def total_length(self) -> int:
+    def _control(self, method: str, status: str) -> str:
         """
+        call the method of aria2 on this download, and persist the status it results in
+        :param method:
+        :type method: str
+        :param status: the status of the download after the call succeeds
+        :type status: str
+        :return:
+        :rtype: str
+        """
+        try:
+            result = getattr(self.instance.rpc_server_proxy.aria2, method)(self.gid)
+        finally:
+            self.invalidate_status()
+        self.status = status
+        self.save(update_fields=("status", "updated_at"))
+        return result
 
+    def pause(self) -> str:
+        """
+        * https://aria2.github.io/manual/en/html/aria2c.html#aria2.pause
         :return:
-        :rtype: int
+        :rtype: str
         """
-        return self._verbose_status["totalLength"]
+        return self._control("pause", "paused")
 
-    @property
-    def completed_length(self) -> int:
+    def unpause(self) -> str:
         """
+        * https://aria2.github.io/manual/en/html/aria2c.html#aria2.unpause
+        :return:
+        :rtype: str
+        """
+        return self._control("unpause", "waiting")
 
+    def remove(self) -> str:
+        """
+        * https://aria2.github.io/manual/en/html/aria2c.html#aria2.remove
         :return:
-        :rtype: int
+        :rtype: str
         """
-        return self._verbose_status["completedLength"]
+        return self._control("remove", "removed")
 
     @property
-    def dir(self) -> str:
+    def verbose_status(self) -> str:
         """
 
         :return:
         :rtype: str
         """
-        return self._verbose_status["dir"]
+        return pprint.pformat(self._verbose_status)
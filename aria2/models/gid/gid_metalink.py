@@ -21,6 +21,8 @@ class GIDMetaLink(AbstractGIDTask):
 
     metalink = models.TextField()
 
+    rpc_method = "aria2.addMetalink"
+
     class Meta:
         verbose_name = "GID - MetaLink"
 
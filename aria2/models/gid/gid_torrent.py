@@ -27,6 +27,8 @@ class GIDTorrent(AbstractGIDTask):
     torrent = models.TextField()
     uris = models.JSONField()
 
+    rpc_method = "aria2.addTorrent"
+
     class Meta:
         verbose_name = "GID - Torrent"
 
@@ -24,6 +24,8 @@ class GIDUri(AbstractGIDTask):
 
     uris = models.JSONField()
 
+    rpc_method = "aria2.addUri"
+
     class Meta:
         verbose_name = "GID - Uri"
 
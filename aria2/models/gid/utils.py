@@ -9,12 +9,17 @@ reported and the download is not added.
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING
+from collections import defaultdict
+from typing import TYPE_CHECKING, Optional
+from xmlrpc.client import Fault, ProtocolError
 
 from django.apps import apps
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
 
+from ...exceptions import InvalidOption
 from ..utils import TimeStampMixin
 from . import GID
 
@@ -24,14 +29,154 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-def get_default_instance() -> TInstance:
+def get_default_instance() -> Optional[TInstance]:
     """
-
+    the first instance in use of the default profile
     :return:
-    :rtype: Instance
+    :rtype: Optional[Instance]
     """
     Instance: TInstance = apps.get_model("aria2", "Instance")
-    return Instance.objects.get(profile__name=settings.ARIA2_DEFAULT_INSTANCE)
+    return (
+        Instance.objects.filter(
+            profile__name=settings.ARIA2_DEFAULT_INSTANCE, idle=False
+        )
+        .order_by("pk")
+        .first()
+    )
+
+
+class QuerySet(models.QuerySet):
+    """
+    custom QuerySet to fit Aria2 GID task
+    """
+
+    def submit_pending(
+        self, chunk_size: Optional[int] = None
+    ) -> tuple[int, dict[AbstractGIDTask, Exception]]:
+        """
+        submit the tasks not submitted yet in chunks: the GIDs of each chunk are
+        allocated and saved first, then the chunk is sent to each instance by one
+        system.multicall with the option gid; the failed tasks are reported without
+        aborting the others, and can be submitted again later
+        * https://aria2.github.io/manual/en/html/aria2c.html#system.multicall
+        :param chunk_size:
+        :type chunk_size: Optional[int]
+        :return: the number of the submitted tasks, and the failures of the others
+        :rtype: tuple[int, dict[AbstractGIDTask, Exception]]
+        """
+        chunk_size = chunk_size or settings.ARIA2_GID_SUBMIT_CHUNK_SIZE
+        pending = (
+            self.filter(submitted_at__isnull=True, instance__isnull=False)
+            .select_related("instance__binary")
+            .order_by("pk")
+        )
+        submitted = 0
+        failures: dict[AbstractGIDTask, Exception] = {}
+
+        last_pk = 0
+        while chunk := list(pending.filter(pk__gt=last_pk)[:chunk_size]):
+            last_pk = chunk[-1].pk
+
+            groups: dict[int, list[AbstractGIDTask]] = defaultdict(list)
+            for task in chunk:
+                groups[task.instance_id].append(task)
+
+            for group in groups.values():
+                try:
+                    tasks = self._submit(group[0].instance, group, failures)
+                except (OSError, Fault, ProtocolError) as exc:
+                    # the whole call of this instance fails, e.g. a wrong secret
+                    logger.error("Fail to submit to %s: %s", group[0].instance, exc)
+                    failures.update((task, exc) for task in group)
+                    continue
+                now = timezone.now()
+                for task in tasks:
+                    task.submitted_at = task.updated_at = now
+                self.model.objects.bulk_update(tasks, ("submitted_at", "updated_at"))
+                submitted += len(tasks)
+        return submitted, failures
+
+    def _submit(
+        self,
+        instance: TInstance,
+        tasks: list[AbstractGIDTask],
+        failures: dict[AbstractGIDTask, Exception],
+    ) -> list[AbstractGIDTask]:
+        """
+        submit the tasks to the same instance by one system.multicall, the tasks with
+        invalid options are failed without being sent
+        :param instance:
+        :type instance: Instance
+        :param tasks:
+        :type tasks: list[AbstractGIDTask]
+        :param failures:
+        :type failures: dict[AbstractGIDTask, Exception]
+        :return: the submitted tasks
+        :rtype: list[AbstractGIDTask]
+        """
+        validator = instance.binary.validator
+        valid: list[AbstractGIDTask] = []
+        for task in tasks:
+            try:
+                validator.validate(task.options or {})
+            except InvalidOption as exc:
+                failures[task] = exc
+                logger.warning("Fail to submit %s: %s", task, exc)
+                continue
+            valid.append(task)
+        if not (tasks := valid):
+            return []
+
+        if unallocated := [task for task in tasks if not task.gid_id]:
+            with transaction.atomic():
+                gids = GID.objects.allocate(instance, len(unallocated))
+                for task, gid in zip(unallocated, gids):
+                    task.gid = gid
+                self.model.objects.bulk_update(unallocated, ("gid",))
+
+        results = instance.rpc_server_proxy.system.multicall(
+            [
+                {"methodName": task.rpc_method, "params": task.get_params()}
+                for task in tasks
+            ]
+        )
+        submitted: list[AbstractGIDTask] = []
+        faulted: list[tuple[AbstractGIDTask, Fault]] = []
+        extra_gids: list[GID] = []
+        for task, result in zip(tasks, results):
+            if isinstance(result, dict):  # the fault struct of this call
+                faulted.append(
+                    (task, Fault(result["faultCode"], result["faultString"]))
+                )
+                continue
+            # aria2.addMetalink returns the GIDs of all downloads
+            if isinstance(result[0], list):
+                extra_gids.extend(
+                    GID(gid=value, instance=instance)
+                    for value in result[0]
+                    if value != task.gid_id
+                )
+            submitted.append(task)
+        GID.objects.bulk_create(extra_gids, ignore_conflicts=True)
+
+        if faulted:
+            # a retried task may be added already by the previous submission
+            results = instance.rpc_server_proxy.system.multicall(
+                [
+                    {"methodName": "aria2.tellStatus", "params": [task.gid_id, ["gid"]]}
+                    for task, _ in faulted
+                ]
+            )
+            for (task, fault), result in zip(faulted, results):
+                if isinstance(result, dict):
+                    failures[task] = fault
+                    logger.warning("Fail to submit %s: %s", task, fault)
+                    continue
+                submitted.append(task)
+        return submitted
+
+
+Manager = models.Manager.from_queryset(QuerySet)
 
 
 class AbstractGIDTask(TimeStampMixin):
@@ -51,32 +196,61 @@ class AbstractGIDTask(TimeStampMixin):
     secret = models.CharField(blank=True, max_length=256, null=True)
     options = models.JSONField(blank=True, null=True)
     position = models.PositiveIntegerField(blank=True, null=True)
+    submitted_at = models.DateTimeField(blank=True, null=True)
+
+    objects = Manager()
+
+    rpc_method: str
 
     class Meta:
         abstract = True
 
+    def clean(self) -> None:
+        """
+        check the options by the catalog of the binary of the instance
+        :return:
+        :rtype: None
+        :raise ValidationError: any of the options is invalid
+        """
+        if not (self.instance_id and self.options):
+            return
+        try:
+            self.instance.binary.validator.validate(self.options)
+        except InvalidOption as exc:
+            raise ValidationError({"options": str(exc)}) from exc
+
     def _get_args(self) -> list:
         """
 
         :return:
         :rtype: list
         """
-        args = [self.options if self.options else {}]
+        options = dict(self.options) if self.options else {}
+        if self.gid_id:
+            options["gid"] = self.gid_id
+        args = [options]
         if self.position:
             args.append(self.position)
         return args
 
-    def create_gid(self) -> None:
+    def get_params(self) -> list:
         """
 
         :return:
-        :rtype: None
+        :rtype: list
         """
         args = self._get_args()
         if self.secret:
             args = [self.secret, *args]
-        self.gid = GID.objects.create(
-            gid=self.instance.rpc_server_proxy.aria2.addUri(*args),
-            instance=self.instance,
-        )
-        return self.save()
+        return args
+
+    def create_gid(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        _, failures = self.__class__.objects.filter(pk=self.pk).submit_pending()
+        self.refresh_from_db()
+        for exc in failures.values():
+            raise exc
@@ -3,46 +3,359 @@ The model of Aria2 Instance
 """
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+import os
+import re
+import signal
+import socket
 import subprocess
-from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, Any, Iterable, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Mapping, Optional, Sequence
 from urllib.parse import ParseResult, urlunparse
-from xmlrpc.client import ServerProxy
+from xmlrpc.client import ProtocolError
+
+from websockets.exceptions import InvalidHandshake
 
 from django.apps import apps
-from django.db import models
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models.query import ModelIterable
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils.functional import cached_property
 
-from ..exceptions import CommandExecutionFailed, CommandNotFound
+from ..exceptions import CommandExecutionFailed, InvalidOption
+from ..process import ProcessSnapshot, get_index, read_argv, sample, sample_all
+from ..rpc import (
+    AsyncServerProxy,
+    AsyncWebSocketServerProxy,
+    ThreadLocalServerProxy,
+    WebSocketServerProxy,
+    fan_out,
+    registry,
+)
 
 if TYPE_CHECKING:
-    from .argument import Argument as TArgument
     from .binary import Binary as TBinary
-    from .profile import ArgumentPair as TArgumentPair
     from .profile import Profile as TProfile
 
 
 logger = logging.getLogger(__name__)
 
+# the RPC ports and the first listen ports allocated by this process to the instances
+# not saved yet, apart from those of the other launches at the same time
+_reserved_ports: dict[int, int] = {}
+_reserved_ports_lock = threading.Lock()
+
+# the profiles whose warm pools are being filled
+_filling_pools: set[str] = set()
+_filling_pools_lock = threading.Lock()
+
+# the arguments of aria2c allocated to each instance of a profile
+ALLOCATED_ARGUMENTS = frozenset(
+    (
+        "--rpc-listen-port",
+        "--listen-port",
+        "--dht-listen-port",
+        "--input-file",
+        "--save-session",
+    )
+)
+
+
+def get_rpc_endpoint(pairs: Iterable[tuple[str, str]]) -> dict[str, Any]:
+    """
+    the fields of the RPC endpoint, the listen ports and the session file of Instance in
+    the arguments of aria2c
+    :param pairs: the pairs of the long arguments and their values
+    :type pairs: Iterable[tuple[str, str]]
+    :return:
+    :rtype: dict[str, Any]
+    """
+    endpoint: dict[str, Any] = {}
+    for argument, value in pairs:
+        if argument == "--rpc-listen-port":
+            endpoint["rpc_port"] = int(value)
+        elif argument == "--rpc-secret":
+            endpoint["rpc_secret"] = value
+        elif argument == "--listen-port" and value.replace("-", "").isdigit():
+            start, _, end = value.partition("-")
+            endpoint["listen_port_start"] = int(start)
+            endpoint["listen_port_end"] = int(end or start)
+        elif argument == "--save-session":
+            endpoint["session_file"] = value
+    return endpoint
+
+
+def strip_allocated_arguments(args: Iterable[str]) -> tuple[str, ...]:
+    """
+    the arguments without those allocated to each instance
+    :param args:
+    :type args: Iterable[str]
+    :return:
+    :rtype: tuple[str, ...]
+    """
+    return tuple(
+        arg for arg in args if arg.partition("=")[0] not in ALLOCATED_ARGUMENTS
+    )
+
+
+def get_args_hash(args: Iterable[str]) -> str:
+    """
+    the hash of the arguments without those allocated to each instance, regardless of
+    their order, shared by a profile and its instances
+    :param args:
+    :type args: Iterable[str]
+    :return:
+    :rtype: str
+    """
+    return hashlib.sha256(
+        "\0".join(sorted(strip_allocated_arguments(args))).encode()
+    ).hexdigest()
+
+
+def is_port_free(host: str, port: int) -> bool:
+    """
+
+    :param host:
+    :type host: str
+    :param port:
+    :type port: int
+    :return:
+    :rtype: bool
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind((host, port))
+        except OSError:
+            return False
+    return True
+
+
+def backoff(deadline: float, delay: float, maximum: float = 1) -> Iterator[None]:
+    """
+    yield until the deadline, sleeping twice as long after each attempt up to maximum
+    :param deadline: the time of time.monotonic
+    :type deadline: float
+    :param delay: the seconds to sleep after the first attempt
+    :type delay: float
+    :param maximum:
+    :type maximum: float
+    :return:
+    :rtype: Iterator[None]
+    """
+    while True:
+        yield
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, maximum)
+
+
+def is_running(pid: int, command: str) -> bool:
+    """
+    the process of the pid runs the command, not another process reusing the pid after
+    the one of the command exits; the zombies have no argv and are not running
+    :param pid:
+    :type pid: int
+    :param command: the argv joined by spaces
+    :type command: str
+    :return:
+    :rtype: bool
+    """
+    try:
+        return " ".join(read_argv(pid)) == command
+    except ProcessLookupError:
+        return False
+
+
+def wait_for_exit(
+    pids: Iterable[int],
+    deadline: float,
+    commands: Optional[Mapping[int, str]] = None,
+) -> set[int]:
+    """
+    wait until the processes exit or the deadline, checking /proc with exponential
+    backoff
+    :param pids:
+    :type pids: Iterable[int]
+    :param deadline: the time of time.monotonic
+    :type deadline: float
+    :param commands: the command of each pid if given, the process of another command
+    reusing the pid counts as exited
+    :type commands: Optional[Mapping[int, str]]
+    :return: the pids still running
+    :rtype: set[int]
+    """
+    running = set(pids)
+    for _ in backoff(deadline, settings.ARIA2_LAUNCH_BACKOFF):
+        running = {
+            pid
+            for pid, snapshot in sample_all(running).items()
+            if snapshot is not None
+            and not snapshot.zombie
+            and (commands is None or is_running(pid, commands[pid]))
+        }
+        if not running:
+            break
+    return running
+
+
+def terminate(process: subprocess.Popen, argv: Sequence[str]) -> None:
+    """
+    terminate the process failed to launch and the daemon forked by it, so that the
+    ports allocated are released; killed if not exiting in time
+    :param process:
+    :type process: subprocess.Popen
+    :param argv:
+    :type argv: Sequence[str]
+    :return:
+    :rtype: None
+    """
+    pids = {process.pid} if process.poll() is None else set()
+    if (daemon := get_index(ttl=0).get_pid(argv)) is not None:
+        pids.add(daemon)
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        if sig == signal.SIGKILL:
+            logger.warning("Kill %s not exiting after SIGTERM", sorted(pids))
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+        if process.poll() is None:
+            try:
+                process.wait(settings.ARIA2_LAUNCH_BACKOFF * 20)
+            except subprocess.TimeoutExpired:
+                pass
+        if not (pids := wait_for_exit(pids, time.monotonic() + 1)):
+            return
+
+
+def terminate_all(commands: Mapping[int, str]) -> None:
+    """
+    terminate the processes launched but not registered, killed if not exiting in
+    time; the pid reused by another process is never signalled
+    :param commands: the command of each pid
+    :type commands: Mapping[int, str]
+    :return:
+    :rtype: None
+    """
+    pids = set(commands)
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        if sig == signal.SIGKILL:
+            logger.warning("Kill %s not exiting after SIGTERM", sorted(pids))
+        for pid in pids:
+            if not is_running(pid, commands[pid]):
+                continue
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+        if not (pids := wait_for_exit(pids, time.monotonic() + 1, commands)):
+            return
+
+
+def get_rpc_endpoint_from_command(command: str) -> dict[str, Any]:
+    """
+
+    :param command:
+    :type command: str
+    :return:
+    :rtype: dict[str, Any]
+    """
+    return get_rpc_endpoint(
+        (argument, value)
+        for argument, _, value in (arg.partition("=") for arg in command.split())
+    )
+
 
 class QuerySet(models.QuerySet):
     """
     custom QuerySet to fit aria2c
     """
 
-    def create_from_pid(self, pid: int | str) -> Instance:
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """
+
+        :param args:
+        :type args: Any
+        :param kwargs:
+        :type kwargs: Any
+        """
+        super().__init__(*args, **kwargs)
+        self._with_process = False
+
+    def _clone(self) -> QuerySet:
+        """
+
+        :return:
+        :rtype: QuerySet
+        """
+        clone = super()._clone()
+        clone._with_process = self._with_process
+        return clone
+
+    def _fetch_all(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        fetched = self._result_cache is not None
+        super()._fetch_all()
+        # values() and values_list() fetch no instance to attach the snapshot to
+        if self._with_process and not fetched and self._iterable_class is ModelIterable:
+            snapshots = sample_all(instance.pid for instance in self._result_cache)
+            for instance in self._result_cache:
+                instance.process = (
+                    snapshots[instance.pid]
+                    if is_running(instance.pid, instance.command)
+                    else None
+                )
+
+    def with_process(self) -> QuerySet:
+        """
+        sample the processes of all instances by one walk of /proc when evaluated, like
+        prefetch_related does for the related objects
+        :return:
+        :rtype: QuerySet
+        """
+        clone = self._chain()
+        clone._with_process = True
+        return clone
+
+    def create_from_pid(
+        self, pid: int | str, profile: Optional[TProfile] = None
+    ) -> Instance:
         """
 
         :param pid:
         :type pid: int | str
+        :param profile: matched by the hash of the arguments if not given
+        :type profile: Optional[Profile]
         :return:
         :rtype: Instance
         """
         Binary: TBinary = apps.get_model("aria2", "Binary")
-        command = Binary.get_command(pid)
-        binary, _ = Binary.objects.get_or_create(path=command.split(maxsplit=1)[0])
-        return self.create(pid=pid, command=command, binary=binary)
+        argv = Binary.get_argv(pid)
+        command = " ".join(argv)
+        binary, _ = Binary.objects.get_or_create(path=argv[0])
+        return self.create(
+            pid=pid,
+            command=command,
+            binary=binary,
+            profile=profile,
+            args_hash=get_args_hash(argv[1:]),
+            **get_rpc_endpoint_from_command(command),
+        )
 
     def create_all_from_aria2c(self, binary: TBinary) -> tuple[Instance, ...]:
         """
@@ -52,35 +365,452 @@ class QuerySet(models.QuerySet):
         :return:
         :rtype: tuple[Aria2cInstance, ...]
         """
-        return tuple(
-            self.create(pid=pid, command=binary.get_command(pid), binary=binary)
-            for pid in binary.get_pids()
+        instances = []
+        for pid in binary.get_pids():
+            argv = binary.get_argv(pid)
+            command = " ".join(argv)
+            instances.append(
+                self.create(
+                    pid=pid,
+                    command=command,
+                    binary=binary,
+                    args_hash=get_args_hash(argv[1:]),
+                    **get_rpc_endpoint_from_command(command),
+                )
+            )
+        return tuple(instances)
+
+    def _allocate(self, instances: Iterable[Instance]) -> None:
+        """
+        allocate a free RPC port, a block of listen ports and a session file to each
+        instance, apart from those of the other instances; the ports are released if
+        the allocation fails
+        :param instances:
+        :type instances: Iterable[Instance]
+        :return:
+        :rtype: None
+        :raise CommandExecutionFailed: no free port in the ranges
+        """
+        rpc_ports = set(self.model.objects.values_list("rpc_port", flat=True))
+        listen_ports = list(
+            self.model.objects.filter(listen_port_start__isnull=False).values_list(
+                "listen_port_start", "listen_port_end"
+            )
         )
+        size = settings.ARIA2_LISTEN_PORT_BLOCK
+        session_dir = Path(settings.ARIA2_SESSION_DIR)
+        session_dir.mkdir(parents=True, exist_ok=True)
+
+        with _reserved_ports_lock:
+            self._allocate_ports(
+                instances,
+                rpc_ports.union(_reserved_ports),
+                listen_ports
+                + [(port, port + size - 1) for port in _reserved_ports.values()],
+            )
+            _reserved_ports.update(
+                (instance.rpc_port, instance.listen_port_start)
+                for instance in instances
+            )
+        try:
+            for instance in instances:
+                # the session is saved to and loaded from the same file, named safely
+                # whatever the name of the profile is
+                name = re.sub(r"[^\w.-]", "_", str(instance.profile))
+                instance.session_file = str(
+                    session_dir / f"{name}-{instance.rpc_port}.session"
+                )
+                Path(instance.session_file).touch()
+        except BaseException:
+            self._release(instances)
+            raise
+
+    @staticmethod
+    def _release(instances: Iterable[Instance]) -> None:
+        """
+        release the ports reserved for the instances
+        :param instances:
+        :type instances: Iterable[Instance]
+        :return:
+        :rtype: None
+        """
+        with _reserved_ports_lock:
+            for instance in instances:
+                _reserved_ports.pop(instance.rpc_port, None)
+
+    @staticmethod
+    def _allocate_ports(
+        instances: Iterable[Instance],
+        rpc_ports: set[int],
+        listen_ports: list[tuple[int, int]],
+    ) -> None:
+        """
+
+        :param instances:
+        :type instances: Iterable[Instance]
+        :param rpc_ports: the RPC ports in use
+        :type rpc_ports: set[int]
+        :param listen_ports: the ranges of the listen ports in use
+        :type listen_ports: list[tuple[int, int]]
+        :return:
+        :rtype: None
+        :raise CommandExecutionFailed: no free port in the ranges
+        """
+        rpc_port_candidates = iter(range(*settings.ARIA2_RPC_PORT_RANGE))
+        start, stop = settings.ARIA2_LISTEN_PORT_RANGE
+        size = settings.ARIA2_LISTEN_PORT_BLOCK
+        listen_port_candidates = iter(range(start, stop - size + 1, size))
+
+        for instance in instances:
+            instance.rpc_port = next(
+                (
+                    port
+                    for port in rpc_port_candidates
+                    if port not in rpc_ports and is_port_free(instance.rpc_host, port)
+                ),
+                None,
+            )
+            instance.listen_port_start = next(
+                (
+                    port
+                    for port in listen_port_candidates
+                    if all(
+                        port + size - 1 < used_start or used_end < port
+                        for used_start, used_end in listen_ports
+                    )
+                ),
+                None,
+            )
+            if instance.rpc_port is None or instance.listen_port_start is None:
+                raise CommandExecutionFailed("No free port for more instances")
+            instance.listen_port_end = instance.listen_port_start + size - 1
 
-    def create_from_profile(self, profile: TProfile) -> Instance:
+    def _build_from_profiles(
+        self, profiles: Iterable[TProfile]
+    ) -> list[tuple[Instance, tuple[str, ...]]]:
+        """
+        the instances not launched yet of the profiles, with their argv
+        :param profiles:
+        :type profiles: Iterable[Profile]
+        :return:
+        :rtype: list[tuple[Instance, tuple[str, ...]]]
         """
+        instances = []
+        for profile in profiles:
+            instances.append(
+                self.model(
+                    binary=profile.binary,
+                    profile=profile,
+                    args_hash=profile.args_hash,
+                    **get_rpc_endpoint(
+                        profile.argumentpair_set.filter(
+                            argument="--rpc-secret"
+                        ).values_list("argument", "value")
+                    ),
+                )
+            )
+        self._allocate(instances)
+
+        built = []
+        try:
+            for instance in instances:
+                argv = instance.build_argv()
+                instance.command = " ".join(argv)
+                built.append((instance, argv))
+        except BaseException:
+            self._release(instances)
+            raise
+        return built
 
+    def find_running(self, profile: TProfile) -> Optional[Instance]:
+        """
+        the running daemon of the same arguments as the profile but of no profile: an
+        instance found without a profile, or a process not registered yet; it is
+        matched by the hash of the arguments, and taken by the profile
         :param profile:
         :type profile: Profile
         :return:
+        :rtype: Optional[Instance]
+        """
+        Binary: TBinary = apps.get_model("aria2", "Binary")
+        orphans = self.filter(
+            binary=profile.binary_id, profile__isnull=True, args_hash=profile.args_hash
+        ).with_process()
+        for instance in orphans.order_by("pk"):
+            if instance.alive:
+                instance.profile = profile
+                instance.save(update_fields=("profile",))
+                return instance
+
+        tracked = set(
+            self.filter(binary=profile.binary_id).values_list("pk", flat=True)
+        )
+        for pid in profile.binary.get_pids():
+            if pid in tracked:
+                continue
+            try:
+                if get_args_hash(Binary.get_argv(pid)[1:]) != profile.args_hash:
+                    continue
+                return self.create_from_pid(pid, profile)
+            except OSError as exc:
+                logger.warning("Fail to register [%s] of %s: %s", pid, profile, exc)
+        return None
+
+    def create_from_profile(
+        self, profile: TProfile, timeout: Optional[float] = None, idle: bool = False
+    ) -> Instance:
+        """
+        launch a new instance of aria2c by the profile, unless a running daemon of the
+        same arguments is not registered to any profile yet
+        :param profile:
+        :type profile: Profile
+        :param timeout: the seconds to wait for the instance to be ready
+        :type timeout: Optional[float]
+        :param idle: the instance is kept in the warm pool of the profile
+        :type idle: bool
+        :return:
         :rtype: Instance
         """
-        command = " ".join(profile.command)
+        if not idle and (instance := self.find_running(profile)):
+            return instance
+        instances, failures = self.create_from_profiles((profile,), timeout, idle)
+        for _, exc in failures:
+            raise exc
+        return instances[0]
+
+    def create_from_profiles(
+        self,
+        profiles: Iterable[TProfile],
+        timeout: Optional[float] = None,
+        idle: bool = False,
+    ) -> tuple[list[Instance], list[tuple[TProfile, Exception]]]:
+        """
+        launch a new instance of aria2c by each of the profiles concurrently, then
+        register all instances ready in one transaction; a profile given many times
+        launches many instances, and a profile with invalid arguments is not launched.
+        If the registration fails, all instances launched are terminated and failed
+        :param profiles:
+        :type profiles: Iterable[Profile]
+        :param timeout: the seconds to wait for each instance to be ready
+        :type timeout: Optional[float]
+        :param idle: the instances are kept in the warm pools of the profiles
+        :type idle: bool
+        :return: the created instances, and the failures of the other profiles
+        :rtype: tuple[list[Instance], list[tuple[Profile, Exception]]]
+        """
+        profiles = list(profiles)
+        invalid: dict[str, InvalidOption] = {}
+        for profile in {profile.pk: profile for profile in profiles}.values():
+            try:
+                profile.validate_arguments()
+            except InvalidOption as exc:
+                logger.error("Fail to launch %s: %s", profile, exc)
+                invalid[profile.pk] = exc
+        failures: list[tuple[TProfile, Exception]] = [
+            (profile, invalid[profile.pk])
+            for profile in profiles
+            if profile.pk in invalid
+        ]
+
+        pending = self._build_from_profiles(
+            profile for profile in profiles if profile.pk not in invalid
+        )
+        if not pending:
+            return [], failures
+
         try:
-            return self.get(command=command)
-        except Instance.DoesNotExist:
-            with subprocess.Popen(profile.command):
-                start = datetime.now()
-                while True:
-                    try:
-                        pid = profile.binary.get_pid(command)
-                    except CommandNotFound as exc:
-                        if (datetime.now() - start) > timedelta(seconds=30):
-                            raise CommandExecutionFailed from exc
-                        continue
-                    return self.create(
-                        pid=pid, command=command, binary=profile.binary, profile=profile
-                    )
+            with ThreadPoolExecutor(len(pending)) as executor:
+                futures = [
+                    (executor.submit(instance.launch, argv, timeout), instance)
+                    for instance, argv in pending
+                ]
+            instances: list[Instance] = []
+            for future, instance in futures:
+                if exc := future.exception():
+                    logger.error("Fail to launch %s: %s", instance.profile, exc)
+                    failures.append((instance.profile, exc))
+                    continue
+                instance.idle = idle
+                instances.append(instance)
+
+            try:
+                with transaction.atomic(using=self.db):
+                    for instance in instances:
+                        instance.save(force_insert=True, using=self.db)
+            except Exception as exc:  # pylint: disable=broad-except
+                # no row is left to stop the daemons launched, e.g. a stale row of pid
+                logger.error("Fail to register the instances launched: %s", exc)
+                terminate_all(
+                    {instance.pid: instance.command for instance in instances}
+                )
+                failures.extend((instance.profile, exc) for instance in instances)
+                instances = []
+        finally:
+            self._release(instance for instance, _ in pending)
+        return instances, failures
+
+    def acquire(self, profile: TProfile, timeout: Optional[float] = None) -> Instance:
+        """
+        hand out an idle instance in the warm pool of the profile, or launch a new one
+        if the pool is empty; the pool is filled again in the background. Each idle
+        instance is handed out once, even to the concurrent requests
+        :param profile:
+        :type profile: Profile
+        :param timeout: the seconds to wait for the new instance to be ready
+        :type timeout: Optional[float]
+        :return:
+        :rtype: Instance
+        """
+        instance = None
+        # compare and set, as select_for_update is ignored by SQLite: the instance
+        # taken by another request at the same time is skipped
+        for candidate in self.filter(profile=profile, idle=True).order_by("pk"):
+            if self.filter(pk=candidate.pk, idle=True).update(idle=False):
+                candidate.idle = False
+                instance = candidate
+                break
+        if profile.warm_pool_size:
+            threading.Thread(
+                target=self.fill_pool,
+                args=(profile, timeout),
+                daemon=True,
+                name=f"aria2-warm-pool-{profile}",
+            ).start()
+        return instance or self.create_from_profile(profile, timeout)
+
+    def fill_pool(
+        self, profile: TProfile, timeout: Optional[float] = None
+    ) -> tuple[list[Instance], list[tuple[TProfile, Exception]]]:
+        """
+        launch the idle instances missing in the warm pool of the profile, skipped if
+        the pool is being filled by another thread
+        :param profile:
+        :type profile: Profile
+        :param timeout: the seconds to wait for each instance to be ready
+        :type timeout: Optional[float]
+        :return: the created instances, and the failures
+        :rtype: tuple[list[Instance], list[tuple[Profile, Exception]]]
+        """
+        with _filling_pools_lock:
+            if profile.pk in _filling_pools:
+                return [], []
+            _filling_pools.add(profile.pk)
+        instances: list[Instance] = []
+        failures: list[tuple[TProfile, Exception]] = []
+        try:
+            # the instances handed out during the filling are filled again
+            while not failures:
+                missing = (
+                    profile.warm_pool_size
+                    - self.filter(profile=profile, idle=True).count()
+                )
+                if missing <= 0:
+                    break
+                created, failed = self.create_from_profiles(
+                    (profile,) * missing, timeout, True
+                )
+                instances.extend(created)
+                failures.extend(failed)
+            return instances, failures
+        finally:
+            with _filling_pools_lock:
+                _filling_pools.discard(profile.pk)
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+
+    def fan_out(
+        self,
+        method: str,
+        *params: Any,
+        limit: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> dict[Instance, Any]:
+        """
+        call the same method of all instances concurrently, at most limit calls at the
+        same time and each call within timeout seconds; the exception of a call is
+        returned as its result instead of raised
+        :param method:
+        :type method: str
+        :param params:
+        :type params: Any
+        :param limit:
+        :type limit: Optional[int]
+        :param timeout:
+        :type timeout: Optional[float]
+        :return:
+        :rtype: dict[Instance, Any]
+        """
+        instances = tuple(self)
+
+        async def run() -> dict[Instance, Any]:
+            try:
+                return await fan_out(
+                    {instance: instance.arpc for instance in instances},
+                    method,
+                    params,
+                    limit or settings.ARIA2_RPC_FAN_OUT_LIMIT,
+                    timeout or settings.ARIA2_RPC_TIMEOUT,
+                )
+            finally:
+                await asyncio.gather(*(instance.arpc.close() for instance in instances))
+
+        return asyncio.run(run())
+
+    def shutdown(self, timeout: Optional[float] = None) -> set[int]:
+        """
+        shut down all instances concurrently: aria2.shutdown first, then
+        aria2.forceShutdown to those still running after the timeout, and SIGTERM at
+        last; each RPC call is bounded by the timeout, and the next step runs however
+        the call ends. The instances are marked stopping first, so they are not
+        launched again by the supervisor, and unmarked if still running at last. The
+        pid reused by another process after the instance exits is never signalled
+        :param timeout: the seconds to wait for the instances to exit at each step
+        :type timeout: Optional[float]
+        :return: the pids still running
+        :rtype: set[int]
+        """
+        timeout = timeout or settings.ARIA2_SHUTDOWN_TIMEOUT
+        commands = dict(self.values_list("pk", "command"))
+        self.model.objects.filter(pk__in=commands).update(stopping=True)
+
+        # the pid reused by another process counts as exited, and is never signalled
+        running = {pid for pid, command in commands.items() if is_running(pid, command)}
+        for method in ("aria2.shutdown", "aria2.forceShutdown"):
+            if not running:
+                return running
+            try:
+                self.model.objects.filter(pk__in=running).fan_out(
+                    method, timeout=timeout
+                )
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("Fail to call %s: %s", method, exc)
+            running = wait_for_exit(running, time.monotonic() + timeout, commands)
+
+        for pid in running:
+            logger.warning("Terminate [%s] not exiting after aria2.forceShutdown", pid)
+            if not is_running(pid, commands[pid]):
+                continue
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        running = wait_for_exit(running, time.monotonic() + timeout, commands)
+        for pid in running:
+            logger.error("[%s] is still running after SIGTERM", pid)
+        self.model.objects.filter(pk__in=running).update(stopping=False)
+        return running
+
+    def delete(self, timeout: Optional[float] = None) -> tuple[int, dict[str, int]]:
+        """
+        shut down the instances before deleting them, the instances still running are
+        kept
+        :param timeout: the seconds to wait for the instances to exit at each step
+        :type timeout: Optional[float]
+        :return:
+        :rtype: tuple[int, dict[str, int]]
+        """
+        running = self.shutdown(timeout)
+        return models.QuerySet.delete(self.exclude(pk__in=running))
 
 
 Manager = models.Manager.from_queryset(QuerySet)
@@ -91,17 +821,42 @@ class Instance(models.Model):
     The model of Aria2 instance
     """
 
+    class Transport(models.TextChoices):
+        """
+        the transports of the RPC interface of aria2
+        """
+
+        XMLRPC = "xmlrpc", "XML-RPC over HTTP"
+        WEBSOCKET = "websocket", "JSON-RPC over WebSocket"
+
     pid = models.IntegerField(primary_key=True)
-    command = models.CharField(max_length=256, unique=True)
+    command = models.CharField(max_length=4096, unique=True)
 
     binary = models.ForeignKey("Binary", on_delete=models.CASCADE)
-    profile = models.OneToOneField(
+    profile = models.ForeignKey(
         "Profile", blank=True, null=True, on_delete=models.CASCADE
     )
 
     effective_user_name = models.CharField(blank=True, max_length=256, null=True)
     version = models.CharField(blank=True, max_length=256, null=True)
     session_id = models.CharField(blank=True, max_length=256, null=True)
+    rpc_transport = models.CharField(
+        choices=Transport.choices, default=Transport.XMLRPC, max_length=16
+    )
+    rpc_host = models.CharField(default="localhost", max_length=256)
+    rpc_port = models.PositiveIntegerField(default=6800)
+    rpc_secret = models.CharField(blank=True, max_length=256, null=True)
+    rpc_websocket = models.BooleanField(default=False)
+    listen_port_start = models.PositiveIntegerField(blank=True, null=True)
+    listen_port_end = models.PositiveIntegerField(blank=True, null=True)
+    session_file = models.CharField(blank=True, max_length=4096, null=True)
+    # the hash of the arguments without the allocated ones, the same as the profile's
+    args_hash = models.CharField(blank=True, db_index=True, max_length=64, null=True)
+    # in the warm pool of the profile, ready to be handed out
+    idle = models.BooleanField(default=False)
+    # being shut down, not to be launched again
+    stopping = models.BooleanField(default=False)
+
     objects = Manager()
 
     class Meta:
@@ -118,11 +873,10 @@ class Instance(models.Model):
         :type keep_parents: bool
         :return:
         :rtype: tuple[int, dict[str, int]]
+        :raise CommandExecutionFailed: the instance is still running
         """
-        try:
-            self.rpc_server_proxy.aria2.shutdown()
-        except ConnectionRefusedError as exc:
-            logger.exception(exc)
+        if Instance.objects.filter(pk=self.pk).shutdown():
+            raise CommandExecutionFailed(f"[{self.pk}] is still running")
         return super().delete(using, keep_parents)
 
     def save(
@@ -145,23 +899,136 @@ class Instance(models.Model):
         :return:
         :rtype: None
         """
+        Binary: TBinary = apps.get_model("aria2", "Binary")
         Profile: TProfile = apps.get_model("aria2", "Profile")
+        if not self.args_hash:
+            # the command joined by spaces is lossy, the argv of the process is not
+            try:
+                argv = Binary.get_argv(self.pid)
+            except ProcessLookupError:
+                argv = tuple(self.command.split())
+            self.args_hash = get_args_hash(argv[1:])
         if not self.profile:
-            self.profile = Profile.objects.get(args=self.command.split(maxsplit=1)[-1])
-        if not self.effective_user_name:
-            self.effective_user_name = (
-                subprocess.check_output(
-                    ["ps", "-p", str(self.pid), "-o", "euser", "--no-headers"]
-                )
-                .decode()
-                .strip()
+            # the instances of the same profile differ in the allocated arguments only
+            self.profile = (
+                Profile.objects.filter(binary=self.binary_id, args_hash=self.args_hash)
+                .order_by("pk")
+                .first()
             )
+        if not self.effective_user_name and self.process:
+            self.effective_user_name = self.process.effective_user_name
         if not self.version:
-            self.version = self.rpc_server_proxy.aria2.getVersion()["version"]
+            version = self.rpc_server_proxy.aria2.getVersion()
+            self.version = version["version"]
+            # aria2 serves JSON-RPC over WebSocket only if built with message digest
+            self.rpc_websocket = "Message Digest" in version["enabledFeatures"]
         if not self.session_id:
             self.session_id = self.rpc_server_proxy.aria2.getSessionInfo()["sessionId"]
         return super().save(force_insert, force_update, using, update_fields)
 
+    def build_argv(self) -> tuple[str, ...]:
+        """
+        the command of the profile with the RPC port, the listen ports and the session
+        file allocated to this instance
+        :return:
+        :rtype: tuple[str, ...]
+        """
+        binary, *args = self.profile.command
+        listen_ports = f"{self.listen_port_start}-{self.listen_port_end}"
+        return (
+            binary,
+            *strip_allocated_arguments(args),
+            f"--rpc-listen-port={self.rpc_port}",
+            f"--listen-port={listen_ports}",
+            f"--dht-listen-port={listen_ports}",
+            f"--input-file={self.session_file}",
+            f"--save-session={self.session_file}",
+        )
+
+    def launch(self, argv: Sequence[str], timeout: Optional[float] = None) -> None:
+        """
+        run the argv and wait until the RPC interface answers aria2.getVersion, probing
+        with exponential backoff instead of spinning; the pid of the daemon forked by
+        --daemon is found by its argv in /proc. The version and the session are kept, so
+        save needs no more RPC
+        :param argv:
+        :type argv: Sequence[str]
+        :param timeout: the seconds to wait for the instance to be ready
+        :type timeout: Optional[float]
+        :return:
+        :rtype: None
+        :raise CommandExecutionFailed: aria2c exits with error or is not ready in time
+        """
+        deadline = time.monotonic() + (timeout or settings.ARIA2_LAUNCH_TIMEOUT)
+        pid = self.pid
+        process = subprocess.Popen(argv)  # pylint: disable=consider-using-with
+        proxy = ThreadLocalServerProxy(
+            self.rpc_server_address, self.rpc_secret, settings.ARIA2_RPC_TIMEOUT
+        )
+        ready = False
+        try:
+            for _ in backoff(deadline, settings.ARIA2_LAUNCH_BACKOFF):
+                if process.poll():
+                    raise CommandExecutionFailed(
+                        f"{argv[0]} exits with [{process.returncode}]"
+                    )
+                try:
+                    version = proxy.aria2.getVersion()
+                except (OSError, ProtocolError):  # not listening or not ready yet
+                    continue
+                if process.poll() is None:  # not daemonized
+                    self.pid = process.pid
+                else:
+                    self.pid = get_index(ttl=0).get_pid(argv)
+                    if self.pid is None:
+                        continue
+                self.version = version["version"]
+                self.rpc_websocket = "Message Digest" in version["enabledFeatures"]
+                self.session_id = proxy.aria2.getSessionInfo()["sessionId"]
+                ready = True
+                return
+            raise CommandExecutionFailed(f"{argv[0]} is not ready in time")
+        finally:
+            proxy.close()
+            if not ready:
+                self.pid = pid
+                terminate(process, argv)
+
+    def relaunch(self, timeout: Optional[float] = None) -> None:
+        """
+        launch the dead instance again with the same arguments and session file, then
+        move this row and the rows referring to it to the new pid in one transaction
+        :param timeout: the seconds to wait for the instance to be ready
+        :type timeout: Optional[float]
+        :return:
+        :rtype: None
+        :raise CommandExecutionFailed: aria2c exits with error or is not ready in time
+        """
+        pid = self.pid
+        argv = (
+            self.build_argv()
+            if self.profile and self.session_file
+            else tuple(self.command.split())
+        )
+        self.launch(argv, timeout)
+        self.command = " ".join(argv)
+        self.__dict__.pop("process", None)
+
+        # the foreign keys are checked at the end of the transaction
+        with transaction.atomic():
+            for relation in self._meta.related_objects:
+                relation.related_model._base_manager.filter(
+                    **{relation.field.name: pid}
+                ).update(**{relation.field.name: self.pid})
+            Instance.objects.filter(pk=pid).update(
+                pid=self.pid,
+                command=self.command,
+                version=self.version,
+                rpc_websocket=self.rpc_websocket,
+                session_id=self.session_id,
+            )
+        registry.evict(pid)
+
     @cached_property
     def rpc_server_address(self) -> str:
         """
@@ -169,13 +1036,9 @@ class Instance(models.Model):
         :return:
         :rtype: str
         """
-        Argument: TArgument = apps.get_model("aria2", "Argument")
-        rpc_listen_port = Argument.objects.get(long_argument="--rpc-listen-port")
-        ArgumentPair: TArgumentPair = self.profile.arguments.through
-        port = ArgumentPair.objects.get(argument=rpc_listen_port).value
         url = ParseResult(
             scheme="http",
-            netloc=f"localhost:{port}",
+            netloc=f"{self.rpc_host}:{self.rpc_port}",
             path="rpc",
             params="",
             query="",
@@ -184,14 +1047,99 @@ class Instance(models.Model):
         return urlunparse(url)
 
     @cached_property
-    def rpc_server_proxy(self) -> ServerProxy:
+    def rpc_websocket_address(self) -> str:
+        """
+
+        :return:
+        :rtype: str
+        """
+        url = ParseResult(
+            scheme="ws",
+            netloc=f"{self.rpc_host}:{self.rpc_port}",
+            path="jsonrpc",
+            params="",
+            query="",
+            fragment="",
+        )
+        return urlunparse(url)
+
+    @property
+    def rpc_server_proxy(self) -> ThreadLocalServerProxy | WebSocketServerProxy:
         """
         find all methods of aria2 rpc methods
         * https://aria2.github.io/manual/en/html/aria2c.html#methods
+        the client is shared in the process by the registry
+        :return:
+        :rtype: ThreadLocalServerProxy | WebSocketServerProxy
+        """
+        return registry.get(self.pid, self.session_id, self._create_rpc_server_proxy)
+
+    def _create_rpc_server_proxy(self) -> ThreadLocalServerProxy | WebSocketServerProxy:
+        """
+        JSON-RPC over WebSocket is used if chosen and available, otherwise XML-RPC
+        :return:
+        :rtype: ThreadLocalServerProxy | WebSocketServerProxy
+        """
+        if self.rpc_transport == self.Transport.WEBSOCKET and self.rpc_websocket:
+            proxy = WebSocketServerProxy(
+                self.rpc_websocket_address,
+                self.rpc_secret,
+                settings.ARIA2_RPC_TIMEOUT,
+            )
+            try:
+                proxy.connect()
+            except (InvalidHandshake, OSError) as exc:
+                logger.warning(
+                    "Fall back to XML-RPC, fail to connect to %s: %s",
+                    self.rpc_websocket_address,
+                    exc,
+                )
+            else:
+                return proxy
+        return ThreadLocalServerProxy(
+            self.rpc_server_address, self.rpc_secret, settings.ARIA2_RPC_TIMEOUT
+        )
+
+    @cached_property
+    def arpc(self) -> AsyncServerProxy | AsyncWebSocketServerProxy:
+        """
+        the asyncio client of aria2 rpc methods, e.g.
+        await instance.arpc.aria2.getGlobalStat()
         :return:
-        :rtype: ServerProxy
+        :rtype: AsyncServerProxy | AsyncWebSocketServerProxy
         """
-        return ServerProxy(self.rpc_server_address)
+        if self.rpc_transport == self.Transport.WEBSOCKET and self.rpc_websocket:
+            return AsyncWebSocketServerProxy(
+                self.rpc_websocket_address,
+                self.rpc_secret,
+                settings.ARIA2_RPC_TIMEOUT,
+            )
+        return AsyncServerProxy(
+            self.rpc_server_address, self.rpc_secret, settings.ARIA2_RPC_TIMEOUT
+        )
+
+    @cached_property
+    def process(self) -> Optional[ProcessSnapshot]:
+        """
+        the metrics of the process, read from /proc once per object
+        :return: None if the process is dead, or the pid is reused by another process
+        :rtype: Optional[ProcessSnapshot]
+        """
+        if not is_running(self.pid, self.command):
+            return None
+        try:
+            return sample(self.pid)
+        except ProcessLookupError:
+            return None
+
+    @property
+    def alive(self) -> bool:
+        """
+        the process of the command exists and is not a zombie
+        :return:
+        :rtype: bool
+        """
+        return self.process is not None and not self.process.zombie
 
     @property
     def cpu(self) -> Optional[float]:
@@ -200,34 +1148,16 @@ class Instance(models.Model):
         :return:
         :rtype: Optional[float]
         """
-        try:
-            return float(
-                subprocess.check_output(
-                    ["ps", "-p", str(self.pid), "-o", "%cpu", "--no-headers"]
-                )
-                .decode()
-                .strip()
-            )
-        except subprocess.CalledProcessError as exc:
-            logger.exception(exc)
+        return self.process.cpu_percent if self.process else None
 
     @property
-    def mem(self) -> Optional[str]:
+    def mem(self) -> Optional[float]:
         """
 
         :return:
-        :rtype: Optional[str]
+        :rtype: Optional[float]
         """
-        try:
-            return (
-                subprocess.check_output(
-                    ["ps", "-p", str(self.pid), "-o", "%mem", "--no-headers"]
-                )
-                .decode()
-                .strip()
-            )
-        except subprocess.CalledProcessError as exc:
-            logger.exception(exc)
+        return self.process.mem_percent if self.process else None
 
     @property
     def elapsed_time(self) -> Optional[timedelta]:
@@ -236,18 +1166,7 @@ class Instance(models.Model):
         :return:
         :rtype: Optional[timedelta]
         """
-        try:
-            return timedelta(
-                seconds=int(
-                    subprocess.check_output(
-                        ["ps", "-p", str(self.pid), "-o", "etimes", "--no-headers"]
-                    )
-                    .decode()
-                    .strip()
-                )
-            )
-        except subprocess.CalledProcessError as exc:
-            logger.exception(exc)
+        return self.process.elapsed_time if self.process else None
 
     @property
     def cumulative_cpu_times(self) -> Optional[timedelta]:
@@ -256,15 +1175,22 @@ class Instance(models.Model):
         :return:
         :rtype: Optional[timedelta]
         """
-        try:
-            return timedelta(
-                seconds=int(
-                    subprocess.check_output(
-                        ["ps", "-p", str(self.pid), "-o", "cputimes", "--no-headers"]
-                    )
-                    .decode()
-                    .strip()
-                )
-            )
-        except subprocess.CalledProcessError as exc:
-            logger.exception(exc)
+        return self.process.cpu_times if self.process else None
+
+
+@receiver(post_delete, sender=Instance)
+def evict_rpc_server_proxy(
+    sender: type[Instance], instance: Instance, **kwargs: Any
+) -> None:
+    """
+    drop the client of the deleted instance from the registry
+    :param sender:
+    :type sender: type[Instance]
+    :param instance:
+    :type instance: Instance
+    :param kwargs:
+    :type kwargs: Any
+    :return:
+    :rtype: None
+    """
+    registry.evict(instance.pid)
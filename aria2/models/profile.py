@@ -4,11 +4,17 @@ The model of Aria2 Profile
 from __future__ import annotations
 
 import logging
-from typing import Iterable, Optional
+from typing import Any, Iterable, Optional
 
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.functional import cached_property
 
+from ..exceptions import InvalidOption
+from .instance import get_args_hash
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,7 +28,11 @@ class Profile(models.Model):
 
     arguments = models.ManyToManyField("Argument", through="ArgumentPair")
 
-    args = models.CharField(blank=True, max_length=256, null=True, unique=True)
+    # the arguments compiled from the pairs, sorted by the names, and their hash
+    args = models.JSONField(blank=True, default=list)
+    args_hash = models.CharField(blank=True, db_index=True, max_length=64, null=True)
+    # the number of the idle instances kept ready to be handed out
+    warm_pool_size = models.PositiveIntegerField(default=0)
 
     class Meta:
         verbose_name = "Profile"
@@ -55,18 +65,46 @@ class Profile(models.Model):
         :return:
         :rtype: None
         """
-        self.args = " ".join(self._args)
+        args = self.compile_args()
+        self.args, self.args_hash = list(args), get_args_hash(args)
+        if update_fields is not None:
+            update_fields = {*update_fields, "args", "args_hash"}
+        self.__dict__.pop("_args", None)
+        self.__dict__.pop("command", None)
         return super().save(force_insert, force_update, using, update_fields)
 
+    def compile_args(self) -> tuple[str, ...]:
+        """
+        the arguments of the pairs of this profile, sorted by the names
+        :return:
+        :rtype: tuple[str, ...]
+        """
+        return tuple(
+            f"{argument}={value}"
+            for argument, value in self.argumentpair_set.order_by(
+                "argument"
+            ).values_list("argument", "value")
+        )
+
+    def validate_arguments(self) -> None:
+        """
+        check the values of the arguments by the catalog of the binary
+        :return:
+        :rtype: None
+        :raise InvalidOption: any of the values is invalid
+        """
+        self.binary.validator.validate(
+            dict(self.argumentpair_set.values_list("argument", "value"))
+        )
+
     @cached_property
     def _args(self) -> tuple[str, ...]:
         """
-
+        the arguments compiled at the last save
         :return:
         :rtype: tuple[str, ...]
         """
-        argument: ArgumentPair
-        return tuple(argument.arg for argument in self.arguments.through.objects.all())
+        return tuple(self.args)
 
     @cached_property
     def command(self) -> tuple[str, ...]:
@@ -103,6 +141,20 @@ class ArgumentPair(models.Model):
         """
         return f"{self.arg} ({self.profile})"
 
+    def clean(self) -> None:
+        """
+        check the value by the catalog of the binary of the profile
+        :return:
+        :rtype: None
+        :raise ValidationError: the value is invalid
+        """
+        if not (self.profile_id and self.argument_id):
+            return
+        try:
+            self.profile.binary.validator.validate({self.argument_id: self.value})
+        except InvalidOption as exc:
+            raise ValidationError({"value": str(exc)}) from exc
+
     @cached_property
     def arg(self) -> str:
         """
@@ -111,3 +163,26 @@ class ArgumentPair(models.Model):
         :rtype: str
         """
         return f"{self.argument}={self.value}"
+
+
+@receiver((post_save, post_delete), sender=ArgumentPair)
+def compile_profile_args(
+    sender: type[ArgumentPair], instance: ArgumentPair, **kwargs: Any
+) -> None:
+    """
+    compile the arguments of the profile again once its pairs are changed, skipped if
+    the profile is being deleted
+    :param sender:
+    :type sender: type[ArgumentPair]
+    :param instance:
+    :type instance: ArgumentPair
+    :param kwargs:
+    :type kwargs: Any
+    :return:
+    :rtype: None
+    """
+    origin = kwargs.get("origin")
+    if isinstance(origin, Profile) or getattr(origin, "model", None) is Profile:
+        return
+    if profile := Profile.objects.filter(pk=instance.profile_id).first():
+        profile.save(update_fields=("args", "args_hash"))
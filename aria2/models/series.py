@@ -0,0 +1,43 @@
+"""
+The model of the time series of the resources used by Aria2 Instance
+"""
+from __future__ import annotations
+
+from django.db import models
+from django.utils.functional import cached_property
+
+from ..process import TimeSeries
+from .utils import TimeStampMixin
+
+
+class ResourceSeries(TimeStampMixin):
+    """
+    The time series of the resources used by Aria2 Instance, in the fixed size archives
+    of TimeSeries
+    """
+
+    instance = models.OneToOneField(
+        "Instance", on_delete=models.CASCADE, related_name="resource_series"
+    )
+    data = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Resource Series"
+        verbose_name_plural = "Resource Series"
+
+    def __str__(self) -> str:
+        """
+
+        :return:
+        :rtype: str
+        """
+        return f"Resource Series ({self.instance_id})"
+
+    @cached_property
+    def series(self) -> TimeSeries:
+        """
+
+        :return:
+        :rtype: TimeSeries
+        """
+        return TimeSeries.from_bytes(self.data)
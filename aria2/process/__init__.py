@@ -0,0 +1,8 @@
+"""
+The processes of aria2c and their metrics read from /proc, without forking pidof or ps
+
+* https://man7.org/linux/man-pages/man5/proc.5.html
+"""
+from .index import ProcessIndex, get_index, read_argv
+from .sampler import ProcessSnapshot, sample, sample_all
+from .timeseries import METRICS, TimeSeries
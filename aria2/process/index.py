@@ -0,0 +1,121 @@
+"""
+The index of the running processes by their executables and argv
+
+/proc/<pid>/exe and /proc/<pid>/cmdline of all processes are read in one scan, instead
+of one pidof per binary and one ps per pid. The scan is shared by the lookups within a
+short time.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from .sampler import PROC
+
+_index: Optional[ProcessIndex] = None
+_lock = threading.Lock()
+
+
+def read_argv(pid: int) -> tuple[str, ...]:
+    """
+    the argv of a process, empty for the kernel threads and the zombies
+    :param pid:
+    :type pid: int
+    :return:
+    :rtype: tuple[str, ...]
+    :raise ProcessLookupError: the process does not exist
+    """
+    try:
+        with open(PROC / str(pid) / "cmdline", "rb") as file:
+            cmdline = file.read()
+    except (FileNotFoundError, ProcessLookupError) as exc:
+        raise ProcessLookupError(pid) from exc
+    if not cmdline:
+        return ()
+    return tuple(os.fsdecode(arg) for arg in cmdline.rstrip(b"\0").split(b"\0"))
+
+
+@dataclass(frozen=True)
+class ProcessIndex:
+    """
+    the executables and argv of the running processes at a point in time
+    """
+
+    argv: dict[int, tuple[str, ...]]
+    # the real paths of the executables to the pids
+    pids: dict[str, tuple[int, ...]]
+    # the argv to the pid, the first one if many processes run the same argv
+    commands: dict[tuple[str, ...], int]
+    created_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def scan(cls) -> ProcessIndex:
+        """
+        read the executable and argv of all processes, the kernel threads and the
+        processes exiting during the scan are skipped
+        :return:
+        :rtype: ProcessIndex
+        """
+        argv: dict[int, tuple[str, ...]] = {}
+        pids: dict[str, list[int]] = defaultdict(list)
+        for entry in os.scandir(PROC):
+            if not entry.name.isdigit():
+                continue
+            pid = int(entry.name)
+            try:
+                args = read_argv(pid)
+            except ProcessLookupError:
+                continue
+            if not args:
+                continue
+            try:
+                exe = os.readlink(PROC / entry.name / "exe").removesuffix(" (deleted)")
+            except PermissionError:  # the process of another user, like pidof does
+                exe = os.path.realpath(args[0])
+            except (FileNotFoundError, ProcessLookupError):
+                continue
+            argv[pid] = args
+            pids[exe].append(pid)
+        commands: dict[tuple[str, ...], int] = {}
+        for pid, args in argv.items():
+            commands.setdefault(args, pid)
+        return cls(argv, {exe: tuple(group) for exe, group in pids.items()}, commands)
+
+    def get_pids(self, path: str | os.PathLike) -> tuple[int, ...]:
+        """
+        the pids running the executable, the symbolic links are resolved
+        :param path:
+        :type path: str | os.PathLike
+        :return:
+        :rtype: tuple[int, ...]
+        """
+        return self.pids.get(os.path.realpath(path), ())
+
+    def get_pid(self, argv: Iterable[str]) -> Optional[int]:
+        """
+        the pid running exactly the argv
+        :param argv:
+        :type argv: Iterable[str]
+        :return:
+        :rtype: Optional[int]
+        """
+        return self.commands.get(tuple(argv))
+
+
+def get_index(ttl: float = 1) -> ProcessIndex:
+    """
+    the index scanned within ttl seconds, or a new scan
+    :param ttl:
+    :type ttl: float
+    :return:
+    :rtype: ProcessIndex
+    """
+    global _index  # pylint: disable=global-statement
+    with _lock:
+        if _index is None or time.monotonic() - _index.created_at > ttl:
+            _index = ProcessIndex.scan()
+        return _index
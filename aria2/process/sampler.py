@@ -0,0 +1,219 @@
+"""
+The sampler of the process metrics of aria2c
+
+All metrics of a process are read from /proc/<pid>/stat, status, statm and io in one
+pass, instead of one ps per metric.
+"""
+from __future__ import annotations
+
+import os
+import pwd
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+PROC = Path("/proc")
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+# the last sample of each process: (start time, cpu jiffies, monotonic seconds), to
+# compute the cpu percentage from the delta of jiffies between two samples
+_last_samples: dict[int, tuple[int, int, float]] = {}
+_lock = threading.Lock()
+
+
+@cache
+def get_memory_total() -> int:
+    """
+    the total memory in bytes
+    :return:
+    :rtype: int
+    """
+    with open(PROC / "meminfo", encoding="utf-8") as file:
+        for line in file:
+            if line.startswith("MemTotal:"):
+                return int(line.split()[1]) * 1024
+    raise ValueError("MemTotal is not found in /proc/meminfo")
+
+
+def get_uptime() -> float:
+    """
+    the seconds since boot
+    :return:
+    :rtype: float
+    """
+    return float((PROC / "uptime").read_text(encoding="utf-8").split()[0])
+
+
+@dataclass(frozen=True)
+class ProcessSnapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    the metrics of a process at a point in time
+    """
+
+    pid: int
+    state: str
+    effective_uid: int
+    utime: int  # jiffies
+    stime: int  # jiffies
+    start_time: int  # jiffies since boot
+    rss: int  # bytes
+    read_bytes: Optional[int]  # None if /proc/<pid>/io is not readable
+    write_bytes: Optional[int]
+    uptime: float  # seconds since boot
+    cpu_percent: float
+
+    @property
+    def zombie(self) -> bool:
+        """
+        the process is exited but not reaped yet
+        :return:
+        :rtype: bool
+        """
+        return self.state in ("Z", "X")
+
+    @property
+    def cpu_times(self) -> timedelta:
+        """
+
+        :return:
+        :rtype: timedelta
+        """
+        return timedelta(seconds=(self.utime + self.stime) // CLOCK_TICKS)
+
+    @property
+    def elapsed_time(self) -> timedelta:
+        """
+
+        :return:
+        :rtype: timedelta
+        """
+        return timedelta(seconds=int(self.uptime - self.start_time / CLOCK_TICKS))
+
+    @property
+    def mem_percent(self) -> float:
+        """
+
+        :return:
+        :rtype: float
+        """
+        return round(self.rss * 100 / get_memory_total(), 1)
+
+    @property
+    def effective_user_name(self) -> str:
+        """
+
+        :return:
+        :rtype: str
+        """
+        try:
+            return pwd.getpwuid(self.effective_uid).pw_name
+        except KeyError:
+            return str(self.effective_uid)
+
+
+def _read_io(path: Path) -> tuple[Optional[int], Optional[int]]:
+    """
+    the bytes read from and written to the storage
+    :param path:
+    :type path: Path
+    :return:
+    :rtype: tuple[Optional[int], Optional[int]]
+    """
+    try:
+        text = (path / "io").read_text(encoding="utf-8")
+    except PermissionError:
+        return None, None
+    fields = dict(line.split(": ", maxsplit=1) for line in text.splitlines())
+    return int(fields["read_bytes"]), int(fields["write_bytes"])
+
+
+def sample(pid: int, uptime: Optional[float] = None) -> ProcessSnapshot:
+    """
+    read the metrics of a process from /proc; the cpu percentage is computed from the
+    delta of jiffies since the last sample of the same process, or over its lifetime
+    as ps does for the first sample
+    :param pid:
+    :type pid: int
+    :param uptime: the seconds since boot, read once for many processes if given
+    :type uptime: Optional[float]
+    :return:
+    :rtype: ProcessSnapshot
+    :raise ProcessLookupError: the process does not exist
+    """
+    path = PROC / str(pid)
+    try:
+        stat = (path / "stat").read_text(encoding="utf-8")
+        status = (path / "status").read_text(encoding="utf-8")
+        statm = (path / "statm").read_text(encoding="utf-8")
+        read_bytes, write_bytes = _read_io(path)
+    except FileNotFoundError as exc:
+        with _lock:
+            _last_samples.pop(pid, None)
+        raise ProcessLookupError(pid) from exc
+    now = time.monotonic()
+    if uptime is None:
+        uptime = get_uptime()
+
+    # the command name in parentheses may contain spaces, the field n (1-based in
+    # proc(5)) after it is at the index n - 3
+    fields = stat[stat.rindex(")") + 2 :].split()
+    utime, stime, start_time = int(fields[11]), int(fields[12]), int(fields[19])
+    effective_uid = next(
+        int(line.split()[2]) for line in status.splitlines() if line.startswith("Uid:")
+    )
+
+    jiffies = utime + stime
+    with _lock:
+        last = _last_samples.get(pid)
+        _last_samples[pid] = (start_time, jiffies, now)
+    if last and last[0] == start_time and now > last[2]:
+        cpu_percent = (jiffies - last[1]) / CLOCK_TICKS / (now - last[2]) * 100
+    else:
+        elapsed = uptime - start_time / CLOCK_TICKS
+        cpu_percent = jiffies / CLOCK_TICKS / elapsed * 100 if elapsed > 0 else 0.0
+
+    return ProcessSnapshot(
+        pid=pid,
+        state=fields[0],
+        effective_uid=effective_uid,
+        utime=utime,
+        stime=stime,
+        start_time=start_time,
+        rss=int(statm.split()[1]) * PAGE_SIZE,
+        read_bytes=read_bytes,
+        write_bytes=write_bytes,
+        uptime=uptime,
+        cpu_percent=round(cpu_percent, 1),
+    )
+
+
+def sample_all(pids: Iterable[int]) -> dict[int, Optional[ProcessSnapshot]]:
+    """
+    read the metrics of many processes at the same point in time: /proc is walked once,
+    and the processes not found are None; the last samples of the processes gone are
+    dropped
+    :param pids:
+    :type pids: Iterable[int]
+    :return:
+    :rtype: dict[int, Optional[ProcessSnapshot]]
+    """
+    uptime = get_uptime()
+    running = {int(entry.name) for entry in os.scandir(PROC) if entry.name.isdigit()}
+    with _lock:
+        for pid in set(_last_samples).difference(running):
+            del _last_samples[pid]
+    snapshots: dict[int, Optional[ProcessSnapshot]] = {}
+    for pid in pids:
+        snapshots[pid] = None
+        if pid in running:
+            try:
+                snapshots[pid] = sample(pid, uptime)
+            except ProcessLookupError:
+                pass
+    return snapshots
@@ -0,0 +1,259 @@
+"""
+The time series of the resources used by aria2c, stored like RRDtool
+
+Each archive is a fixed number of rows at a fixed step in one array of doubles, the row
+of the time t is t // step % rows, so the storage never grows. The samples are kept as
+they are in the first archive and consolidated by average into the coarser archives,
+e.g. 1 minute and 1 hour.
+
+* https://oss.oetiker.ch/rrdtool/doc/rrdtool.en.html
+"""
+from __future__ import annotations
+
+import json
+import math
+from array import array
+from typing import Iterator, Optional, Sequence
+
+METRICS = (
+    "cpu_percent",
+    "rss",
+    "read_speed",
+    "write_speed",
+    "download_speed",
+    "upload_speed",
+)
+
+NAN = float("nan")
+
+
+class RingBuffer:
+    """
+    the rows of the metrics at a fixed step, with NaN for the unknown values
+    """
+
+    def __init__(
+        self, step: int, rows: int, last: int = -1, values: Optional[array] = None
+    ) -> None:
+        """
+
+        :param step: the seconds between two rows
+        :type step: int
+        :param rows:
+        :type rows: int
+        :param last: the index of the newest row, t // step
+        :type last: int
+        :param values:
+        :type values: Optional[array]
+        """
+        self.step = step
+        self.rows = rows
+        self.last = last
+        self.values = values or array("d", [NAN]) * (rows * len(METRICS))
+
+    def update(self, index: int, values: Sequence[float]) -> None:
+        """
+        set the row of the index, the rows skipped since the newest one are unknown
+        :param index: t // step
+        :type index: int
+        :param values:
+        :type values: Sequence[float]
+        :return:
+        :rtype: None
+        """
+        if index < self.last - self.rows + 1:  # older than the oldest row
+            return
+        width = len(METRICS)
+        for skipped in range(max(self.last + 1, index - self.rows + 1), index):
+            offset = skipped % self.rows * width
+            self.values[offset : offset + width] = array("d", [NAN]) * width
+        offset = index % self.rows * width
+        self.values[offset : offset + width] = array("d", values)
+        self.last = max(self.last, index)
+
+    def __iter__(self) -> Iterator[tuple[int, tuple[float, ...]]]:
+        """
+        the known rows from the oldest to the newest
+        :return: the time of each row, and its values
+        :rtype: Iterator[tuple[int, tuple[float, ...]]]
+        """
+        width = len(METRICS)
+        for index in range(max(self.last - self.rows + 1, 0), self.last + 1):
+            offset = index % self.rows * width
+            values = tuple(self.values[offset : offset + width])
+            if not all(math.isnan(value) for value in values):
+                yield index * self.step, values
+
+
+class Consolidation:
+    """
+    the sums and the counts of the known values of the row being consolidated
+    """
+
+    def __init__(
+        self,
+        index: int = -1,
+        sums: Optional[list[float]] = None,
+        counts: Optional[list[int]] = None,
+    ) -> None:
+        """
+
+        :param index: the index of the row being consolidated
+        :type index: int
+        :param sums:
+        :type sums: Optional[list[float]]
+        :param counts:
+        :type counts: Optional[list[int]]
+        """
+        self.index = index
+        self.sums = sums or [0.0] * len(METRICS)
+        self.counts = counts or [0] * len(METRICS)
+
+    def reset(self, index: int) -> None:
+        """
+
+        :param index: the index of the row to consolidate
+        :type index: int
+        :return:
+        :rtype: None
+        """
+        self.index = index
+        self.sums = [0.0] * len(METRICS)
+        self.counts = [0] * len(METRICS)
+
+    def add(self, values: Sequence[float]) -> None:
+        """
+
+        :param values:
+        :type values: Sequence[float]
+        :return:
+        :rtype: None
+        """
+        for i, value in enumerate(values):
+            if not math.isnan(value):
+                self.sums[i] += value
+                self.counts[i] += 1
+
+    def average(self) -> tuple[float, ...]:
+        """
+
+        :return:
+        :rtype: tuple[float, ...]
+        """
+        return tuple(
+            total / count if count else NAN
+            for total, count in zip(self.sums, self.counts)
+        )
+
+
+class TimeSeries:
+    """
+    the archives of the metrics of one process, each archive consolidated from the
+    previous one
+    """
+
+    def __init__(
+        self,
+        archives: Sequence[RingBuffer],
+        consolidations: Optional[Sequence[Consolidation]] = None,
+    ) -> None:
+        """
+
+        :param archives: from the finest to the coarsest
+        :type archives: Sequence[RingBuffer]
+        :param consolidations: the row being consolidated of each coarser archive
+        :type consolidations: Optional[Sequence[Consolidation]]
+        """
+        self.archives = list(archives)
+        self.consolidations = list(
+            consolidations or (Consolidation() for _ in self.archives[1:])
+        )
+
+    @classmethod
+    def create(cls, steps: Sequence[tuple[int, int]]) -> TimeSeries:
+        """
+
+        :param steps: the step and the rows of each archive
+        :type steps: Sequence[tuple[int, int]]
+        :return:
+        :rtype: TimeSeries
+        """
+        return cls([RingBuffer(step, rows) for step, rows in steps])
+
+    def record(self, t: float, values: Sequence[float]) -> bool:
+        """
+        record a sample, and consolidate the rows finished into the coarser archives
+        :param t: the seconds since epoch
+        :type t: float
+        :param values: in the order of METRICS, NaN if unknown
+        :type values: Sequence[float]
+        :return: whether a row is consolidated
+        :rtype: bool
+        """
+        self.archives[0].update(int(t // self.archives[0].step), values)
+        consolidated = False
+        for archive, consolidation in zip(self.archives[1:], self.consolidations):
+            index = int(t // archive.step)
+            if consolidation.index == index:
+                consolidation.add(values)
+                break
+            finished = consolidation.index, consolidation.average()
+            consolidation.reset(index)
+            consolidation.add(values)
+            if finished[0] < 0:
+                break
+            archive.update(*finished)
+            consolidated = True
+            # the coarser archive is consolidated from the rows finished in this one
+            t, values = finished[0] * archive.step, finished[1]
+        return consolidated
+
+    def to_bytes(self) -> bytes:
+        """
+        a JSON header of the archives and the consolidations, followed by the arrays
+        :return:
+        :rtype: bytes
+        """
+        header = {
+            "archives": [
+                (archive.step, archive.rows, archive.last) for archive in self.archives
+            ],
+            "consolidations": [
+                (consolidation.index, consolidation.sums, consolidation.counts)
+                for consolidation in self.consolidations
+            ],
+        }
+        return b"".join(
+            (
+                json.dumps(header).encode(),
+                b"\n",
+                *(archive.values.tobytes() for archive in self.archives),
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> TimeSeries:
+        """
+
+        :param data:
+        :type data: bytes
+        :return:
+        :rtype: TimeSeries
+        """
+        header, _, body = bytes(data).partition(b"\n")
+        state = json.loads(header)
+        archives = []
+        offset = 0
+        for step, rows, last in state["archives"]:
+            values = array("d")
+            size = rows * len(METRICS) * values.itemsize
+            values.frombytes(body[offset : offset + size])
+            offset += size
+            archives.append(RingBuffer(step, rows, last, values))
+        return cls(
+            archives,
+            [
+                Consolidation(index, sums, counts)
+                for index, sums, counts in state["consolidations"]
+            ],
+        )
@@ -0,0 +1,9 @@
+"""
+The clients of the RPC interface of aria2
+
+* https://aria2.github.io/manual/en/html/aria2c.html#rpc-interface
+"""
+from .aio import AsyncServerProxy, AsyncWebSocketServerProxy, fan_out
+from .registry import registry
+from .websocket import WebSocketServerProxy
+from .xmlrpc import ThreadLocalServerProxy
@@ -0,0 +1,286 @@
+"""
+The asyncio clients of the RPC interface of aria2
+
+The calls to many instances can run concurrently, e.g.
+
+    await fan_out({instance: instance.arpc for instance in instances},
+                  "aria2.getGlobalStat")
+
+* https://aria2.github.io/manual/en/html/aria2c.html#rpc-interface
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+from typing import Any, Hashable, Optional, TypeVar
+from xmlrpc.client import Fault
+
+from websockets.client import WebSocketClientProtocol, connect
+from websockets.exceptions import ConnectionClosed
+
+from .utils import Method, add_token, dump_request, get_result
+from .xmlrpc import get_server_proxy
+
+_K = TypeVar("_K", bound=Hashable)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncServerProxy:
+    """
+    The asyncio client of the XML-RPC of aria2: xmlrpc.client is blocking, so each call
+    runs with its own ServerProxy in a thread; the timeout is set on the socket, so the
+    thread never outlives the call by more than the timeout
+    """
+
+    def __init__(
+        self, uri: str, secret: Optional[str] = None, timeout: Optional[float] = 30
+    ) -> None:
+        """
+
+        :param uri:
+        :type uri: str
+        :param secret:
+        :type secret: Optional[str]
+        :param timeout:
+        :type timeout: Optional[float]
+        """
+        self.uri = uri
+        self.secret = secret
+        self.timeout = timeout
+
+    def __repr__(self) -> str:
+        """
+
+        :return:
+        :rtype: str
+        """
+        return f"<{self.__class__.__name__} for {self.uri}>"
+
+    def __getattr__(self, name: str) -> Method:
+        """
+
+        :param name:
+        :type name: str
+        :return:
+        :rtype: Method
+        """
+        return Method(self.call, name)
+
+    async def call(
+        self, method: str, params: tuple | list = (), timeout: Optional[float] = None
+    ) -> Any:
+        """
+
+        :param method:
+        :type method: str
+        :param params:
+        :type params: tuple | list
+        :param timeout: the timeout of the proxy if not given
+        :type timeout: Optional[float]
+        :return:
+        :rtype: Any
+        """
+        timeout = timeout or self.timeout
+        return await asyncio.wait_for(
+            asyncio.to_thread(
+                lambda: getattr(get_server_proxy(self.uri, timeout), method)(
+                    *add_token(self.secret, method, params)
+                )
+            ),
+            timeout,
+        )
+
+    async def close(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+
+
+class AsyncWebSocketServerProxy:
+    """
+    The asyncio client of the JSON-RPC over WebSocket of aria2, with the same errors as
+    WebSocketServerProxy. The connection is opened on the first call in an event loop,
+    and opened again if called in another event loop
+    """
+
+    def __init__(
+        self, uri: str, secret: Optional[str] = None, timeout: Optional[float] = 30
+    ) -> None:
+        """
+
+        :param uri:
+        :type uri: str
+        :param secret:
+        :type secret: Optional[str]
+        :param timeout:
+        :type timeout: Optional[float]
+        """
+        self.uri = uri
+        self.secret = secret
+        self.timeout = timeout
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._connection: Optional[WebSocketClientProtocol] = None
+        self._receiver: Optional[asyncio.Task] = None
+        self._ids = itertools.count()
+        # the requests waiting for their responses on the current connection
+        self._pending: dict[str, tuple[str, asyncio.Future]] = {}
+
+    def __repr__(self) -> str:
+        """
+
+        :return:
+        :rtype: str
+        """
+        return f"<{self.__class__.__name__} for {self.uri}>"
+
+    def __getattr__(self, name: str) -> Method:
+        """
+
+        :param name:
+        :type name: str
+        :return:
+        :rtype: Method
+        """
+        return Method(self.call, name)
+
+    async def _connect(
+        self,
+    ) -> tuple[WebSocketClientProtocol, dict[str, tuple[str, asyncio.Future]]]:
+        """
+
+        :return:
+        :rtype: tuple[WebSocketClientProtocol, dict[str, tuple[str, asyncio.Future]]]
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock, self._connection = loop, asyncio.Lock(), None
+        async with self._lock:
+            if self._connection is None:
+                self._connection = await connect(
+                    self.uri, max_size=None, open_timeout=self.timeout
+                )
+                self._pending = {}
+                self._receiver = loop.create_task(
+                    self._receive(self._connection, self._pending)
+                )
+            return self._connection, self._pending
+
+    async def close(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        connection, self._connection = self._connection, None
+        if connection is not None and self._loop is asyncio.get_running_loop():
+            await connection.close()
+
+    async def call(
+        self, method: str, params: tuple | list = (), timeout: Optional[float] = None
+    ) -> Any:
+        """
+
+        :param method:
+        :type method: str
+        :param params:
+        :type params: tuple | list
+        :param timeout: the timeout of the proxy if not given
+        :type timeout: Optional[float]
+        :return:
+        :rtype: Any
+        """
+        connection, pending = await self._connect()
+        request_id = str(next(self._ids))
+        future = asyncio.get_running_loop().create_future()
+        pending[request_id] = (method, future)
+        try:
+            await connection.send(
+                dump_request(request_id, method, add_token(self.secret, method, params))
+            )
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except ConnectionClosed as exc:
+            raise ConnectionResetError(str(exc)) from exc
+        finally:
+            pending.pop(request_id, None)
+
+    async def _receive(
+        self,
+        connection: WebSocketClientProtocol,
+        pending: dict[str, tuple[str, asyncio.Future]],
+    ) -> None:
+        """
+        dispatch the responses by id, the notifications are ignored
+        :param connection:
+        :type connection: WebSocketClientProtocol
+        :param pending:
+        :type pending: dict[str, tuple[str, asyncio.Future]]
+        :return:
+        :rtype: None
+        """
+        try:
+            async for message in connection:
+                data = json.loads(message)
+                try:
+                    method, future = pending.pop(data["id"])
+                except KeyError:  # notification or cancelled request
+                    continue
+                if future.done():
+                    continue
+                try:
+                    future.set_result(get_result(method, data))
+                except Fault as exc:
+                    future.set_exception(exc)
+        except ConnectionClosed as exc:
+            logger.warning("The connection to %s is closed: %s", self.uri, exc)
+        finally:
+            if self._connection is connection:
+                self._connection = None
+            while pending:
+                _, (_, future) = pending.popitem()
+                if not future.done():
+                    future.set_exception(
+                        ConnectionResetError(f"The connection to {self.uri} is closed")
+                    )
+
+
+async def fan_out(
+    proxies: dict[_K, AsyncServerProxy | AsyncWebSocketServerProxy],
+    method: str,
+    params: tuple | list = (),
+    limit: int = 16,
+    timeout: Optional[float] = 10,
+) -> dict[_K, Any]:
+    """
+    call the same method of many proxies concurrently, at most limit calls at the same
+    time and each call within timeout seconds; the exception of a call is returned as
+    its result instead of raised
+    :param proxies:
+    :type proxies: dict[_K, AsyncServerProxy | AsyncWebSocketServerProxy]
+    :param method:
+    :type method: str
+    :param params:
+    :type params: tuple | list
+    :param limit:
+    :type limit: int
+    :param timeout:
+    :type timeout: Optional[float]
+    :return:
+    :rtype: dict[_K, Any]
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def call(proxy: AsyncServerProxy | AsyncWebSocketServerProxy) -> Any:
+        async with semaphore:
+            return await asyncio.wait_for(proxy.call(method, params, timeout), timeout)
+
+    results = await asyncio.gather(
+        *(call(proxy) for proxy in proxies.values()), return_exceptions=True
+    )
+    return dict(zip(proxies, results))
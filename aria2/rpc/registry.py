@@ -0,0 +1,137 @@
+"""
+The process-wide registry of the clients of the RPC interface of aria2
+
+The clients are shared between requests and model objects of the same instance, keyed
+by its pid and session id, so that their connections are reused.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Optional
+
+from .websocket import WebSocketServerProxy
+from .xmlrpc import ThreadLocalServerProxy
+
+logger = logging.getLogger(__name__)
+
+Client = ThreadLocalServerProxy | WebSocketServerProxy
+
+
+class Registry:
+    """
+    The registry of the clients of the RPC interface of aria2
+    """
+
+    def __init__(self) -> None:
+        """
+        count the hits and the misses to confirm the clients are reused
+        """
+        self.hits = 0
+        self.misses = 0
+
+        self._clients: dict[int, tuple[Optional[str], Client]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, pid: int, session_id: Optional[str], factory: Callable[[], Client]
+    ) -> Client:
+        """
+        get the client of the instance, or create it by the factory; the client of an
+        earlier session of the same pid is evicted. The client is created outside the
+        lock, so a slow handshake does not block the lookups of the other instances
+        :param pid:
+        :type pid: int
+        :param session_id:
+        :type session_id: Optional[str]
+        :param factory:
+        :type factory: Callable[[], Client]
+        :return:
+        :rtype: Client
+        """
+        if (client := self._get(pid, session_id)) is not None:
+            return client
+        created = factory()
+        with self._lock:
+            self.misses += 1
+            try:
+                cached_session_id, client = self._clients[pid]
+            except KeyError:
+                pass
+            else:
+                # created by another thread at the same time
+                if cached_session_id == session_id:
+                    created.close()
+                    return client
+                self._evict(pid)
+            self._clients[pid] = (session_id, created)
+            return created
+
+    def _get(self, pid: int, session_id: Optional[str]) -> Optional[Client]:
+        """
+        the client cached of the same session, the client of an earlier session is
+        evicted
+        :param pid:
+        :type pid: int
+        :param session_id:
+        :type session_id: Optional[str]
+        :return:
+        :rtype: Optional[Client]
+        """
+        with self._lock:
+            try:
+                cached_session_id, client = self._clients[pid]
+            except KeyError:
+                return None
+            if cached_session_id == session_id:
+                self.hits += 1
+                return client
+            self._evict(pid)
+            return None
+
+    def evict(self, pid: int) -> None:
+        """
+
+        :param pid:
+        :type pid: int
+        :return:
+        :rtype: None
+        """
+        with self._lock:
+            self._evict(pid)
+
+    def _evict(self, pid: int) -> None:
+        """
+
+        :param pid:
+        :type pid: int
+        :return:
+        :rtype: None
+        """
+        try:
+            _, client = self._clients.pop(pid)
+        except KeyError:
+            return
+        client.close()
+
+    def clear(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        with self._lock:
+            for pid in tuple(self._clients):
+                self._evict(pid)
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+
+        :return:
+        :rtype: dict[str, int]
+        """
+        return {"clients": len(self._clients), "hits": self.hits, "misses": self.misses}
+
+
+registry = Registry()
@@ -0,0 +1,121 @@
+"""
+The utilities of the clients of the RPC interface of aria2
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Optional
+from xmlrpc.client import Fault
+
+
+class Method:  # pylint: disable=too-few-public-methods
+    """
+    the same calling convention as xmlrpc.client.ServerProxy, e.g.
+    proxy.aria2.tellStatus(gid)
+    """
+
+    def __init__(self, send: Callable[[str, tuple], Any], name: str) -> None:
+        """
+
+        :param send:
+        :type send: Callable[[str, tuple], Any]
+        :param name:
+        :type name: str
+        """
+        self._send = send
+        self._name = name
+
+    def __getattr__(self, name: str) -> Method:
+        """
+
+        :param name:
+        :type name: str
+        :return:
+        :rtype: Method
+        """
+        return Method(self._send, f"{self._name}.{name}")
+
+    def __call__(self, *params: Any) -> Any:
+        """
+
+        :param params:
+        :type params: Any
+        :return:
+        :rtype: Any
+        """
+        return self._send(self._name, params)
+
+
+def add_token(secret: Optional[str], method: str, params: tuple | list) -> list:
+    """
+    prepend the secret token to the parameters of the methods of aria2, including the
+    ones in system.multicall, unless the token is given already
+    * https://aria2.github.io/manual/en/html/aria2c.html#rpc-authorization-secret-token
+    :param secret:
+    :type secret: Optional[str]
+    :param method:
+    :type method: str
+    :param params:
+    :type params: tuple | list
+    :return:
+    :rtype: list
+    """
+    params = list(params)
+    if not secret:
+        return params
+    if method == "system.multicall":
+        return [
+            [
+                {
+                    **call,
+                    "params": add_token(secret, call["methodName"], call["params"]),
+                }
+                for call in params[0]
+            ]
+        ]
+    if not method.startswith("aria2.") or (
+        params and isinstance(params[0], str) and params[0].startswith("token:")
+    ):
+        return params
+    return [f"token:{secret}", *params]
+
+
+def dump_request(request_id: str, method: str, params: tuple | list) -> str:
+    """
+
+    :param request_id:
+    :type request_id: str
+    :param method:
+    :type method: str
+    :param params:
+    :type params: tuple | list
+    :return:
+    :rtype: str
+    """
+    return json.dumps(
+        {"jsonrpc": "2.0", "id": request_id, "method": method, "params": list(params)}
+    )
+
+
+def get_result(method: str, response: dict[str, Any]) -> Any:
+    """
+    the result of a response of JSON-RPC as if returned by XML-RPC: the error is raised
+    as xmlrpc.client.Fault, and the errors in system.multicall are returned as the
+    fault structs
+    :param method:
+    :type method: str
+    :param response:
+    :type response: dict[str, Any]
+    :return:
+    :rtype: Any
+    """
+    if "error" in response:
+        raise Fault(response["error"]["code"], response["error"]["message"])
+    if method == "system.multicall":
+        return [
+            {"faultCode": i["code"], "faultString": i["message"]}
+            if isinstance(i, dict)
+            else i
+            for i in response["result"]
+        ]
+    return response["result"]
@@ -0,0 +1,198 @@
+"""
+The client of the JSON-RPC over WebSocket of aria2
+
+Many calls can be in flight on one long-lived connection at the same time: each request
+carries its own id and a background thread dispatches the responses by id, as well as
+the notifications sent by aria2 to the listeners.
+
+* https://aria2.github.io/manual/en/html/aria2c.html#json-rpc-over-websocket
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+from xmlrpc.client import Fault
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import ClientConnection, connect
+
+from .utils import Method, add_token, dump_request, get_result
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[str, list[dict[str, Any]]], None]
+
+
+class WebSocketServerProxy:
+    """
+    The client of the JSON-RPC over WebSocket of aria2, which can replace
+    xmlrpc.client.ServerProxy: the errors of aria2 are raised as xmlrpc.client.Fault,
+    and the faults in system.multicall are returned as the fault structs of XML-RPC
+    """
+
+    def __init__(
+        self, uri: str, secret: Optional[str] = None, timeout: Optional[float] = 30
+    ) -> None:
+        """
+
+        :param uri:
+        :type uri: str
+        :param secret:
+        :type secret: Optional[str]
+        :param timeout:
+        :type timeout: Optional[float]
+        """
+        self.uri = uri
+        self.secret = secret
+        self.timeout = timeout
+        self.listeners: list[Listener] = []
+
+        self._connection: Optional[ClientConnection] = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        # the requests waiting for their responses on the current connection
+        self._pending: dict[str, tuple[str, Future]] = {}
+
+    def __repr__(self) -> str:
+        """
+
+        :return:
+        :rtype: str
+        """
+        return f"<{self.__class__.__name__} for {self.uri}>"
+
+    def __getattr__(self, name: str) -> Method:
+        """
+
+        :param name:
+        :type name: str
+        :return:
+        :rtype: Method
+        """
+        return Method(self.call, name)
+
+    @property
+    def connected(self) -> bool:
+        """
+
+        :return:
+        :rtype: bool
+        """
+        return self._connection is not None
+
+    def connect(self) -> ClientConnection:
+        """
+        open the connection if not yet, and start the thread to receive messages
+        :return:
+        :rtype: ClientConnection
+        """
+        return self._connect()[0]
+
+    def _connect(self) -> tuple[ClientConnection, dict[str, tuple[str, Future]]]:
+        """
+
+        :return:
+        :rtype: tuple[ClientConnection, dict[str, tuple[str, Future]]]
+        """
+        with self._lock:
+            if self._connection is None:
+                self._connection = connect(
+                    self.uri, max_size=None, open_timeout=self.timeout
+                )
+                self._pending = {}
+                threading.Thread(
+                    target=self._receive,
+                    args=(self._connection, self._pending),
+                    daemon=True,
+                    name=f"aria2-jsonrpc-{self.uri}",
+                ).start()
+            return self._connection, self._pending
+
+    def close(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        with self._lock:
+            connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.close()
+
+    def submit(self, method: str, params: tuple | list = ()) -> Future:
+        """
+        send a request without waiting for its response
+        :param method:
+        :type method: str
+        :param params:
+        :type params: tuple | list
+        :return:
+        :rtype: Future
+        """
+        connection, pending = self._connect()
+        request_id = str(next(self._ids))
+        future: Future = Future()
+        pending[request_id] = (method, future)
+        try:
+            connection.send(
+                dump_request(request_id, method, add_token(self.secret, method, params))
+            )
+        except ConnectionClosed as exc:
+            pending.pop(request_id, None)
+            raise ConnectionResetError(str(exc)) from exc
+        return future
+
+    def call(self, method: str, params: tuple | list = ()) -> Any:
+        """
+        send a request and wait for its response
+        :param method:
+        :type method: str
+        :param params:
+        :type params: tuple | list
+        :return:
+        :rtype: Any
+        """
+        return self.submit(method, params).result(self.timeout)
+
+    def _receive(
+        self, connection: ClientConnection, pending: dict[str, tuple[str, Future]]
+    ) -> None:
+        """
+        dispatch the responses by id and the notifications to the listeners
+        :param connection:
+        :type connection: ClientConnection
+        :param pending:
+        :type pending: dict[str, tuple[str, Future]]
+        :return:
+        :rtype: None
+        """
+        try:
+            for message in connection:
+                data = json.loads(message)
+                if data.get("id") is None:  # notification
+                    for listener in self.listeners:
+                        listener(data["method"], data.get("params", []))
+                    continue
+                try:
+                    method, future = pending.pop(data["id"])
+                except KeyError:
+                    continue
+                try:
+                    future.set_result(get_result(method, data))
+                except Fault as exc:
+                    future.set_exception(exc)
+        except ConnectionClosed as exc:
+            logger.warning("The connection to %s is closed: %s", self.uri, exc)
+        finally:
+            with self._lock:
+                if self._connection is connection:
+                    self._connection = None
+            while pending:
+                _, (_, future) = pending.popitem()
+                future.set_exception(
+                    ConnectionResetError(f"The connection to {self.uri} is closed")
+                )
@@ -0,0 +1,136 @@
+"""
+The client of the XML-RPC of aria2
+
+* https://aria2.github.io/manual/en/html/aria2c.html#xml-rpc-interface
+"""
+from __future__ import annotations
+
+import threading
+from http.client import HTTPConnection
+from typing import Any, Optional
+from urllib.parse import urlparse
+from xmlrpc.client import SafeTransport, ServerProxy, Transport
+
+from .utils import Method, add_token
+
+
+class TimeoutTransportMixin:
+    """
+    xmlrpc.client.Transport connects without timeout, so a daemon never replying blocks
+    the call forever; the timeout is set on the connection instead
+    """
+
+    timeout: Optional[float] = None
+
+    def make_connection(self, host: Any) -> HTTPConnection:
+        """
+
+        :param host:
+        :type host: Any
+        :return:
+        :rtype: HTTPConnection
+        """
+        connection = super().make_connection(host)  # type: ignore
+        connection.timeout = self.timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(self.timeout)
+        return connection
+
+
+class TimeoutTransport(TimeoutTransportMixin, Transport):
+    """
+    the transport of http with timeout
+    """
+
+
+class SafeTimeoutTransport(TimeoutTransportMixin, SafeTransport):
+    """
+    the transport of https with timeout
+    """
+
+
+def get_server_proxy(uri: str, timeout: Optional[float] = 30) -> ServerProxy:
+    """
+    the ServerProxy of which each request times out in the given seconds
+    :param uri:
+    :type uri: str
+    :param timeout:
+    :type timeout: Optional[float]
+    :return:
+    :rtype: ServerProxy
+    """
+    if urlparse(uri).scheme == "https":
+        transport: Transport = SafeTimeoutTransport()
+    else:
+        transport = TimeoutTransport()
+    transport.timeout = timeout
+    return ServerProxy(uri, transport=transport)
+
+
+class ThreadLocalServerProxy:
+    """
+    xmlrpc.client.ServerProxy keeps one HTTP connection alive and can not be shared
+    between threads, so each thread keeps its own ServerProxy of the same uri
+    """
+
+    def __init__(
+        self, uri: str, secret: Optional[str] = None, timeout: Optional[float] = 30
+    ) -> None:
+        """
+
+        :param uri:
+        :type uri: str
+        :param secret:
+        :type secret: Optional[str]
+        :param timeout:
+        :type timeout: Optional[float]
+        """
+        self.uri = uri
+        self.secret = secret
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __repr__(self) -> str:
+        """
+
+        :return:
+        :rtype: str
+        """
+        return f"<{self.__class__.__name__} for {self.uri}>"
+
+    def __getattr__(self, name: str) -> Method:
+        """
+
+        :param name:
+        :type name: str
+        :return:
+        :rtype: Method
+        """
+        return Method(self.call, name)
+
+    def call(self, method: str, params: tuple | list = ()) -> Any:
+        """
+
+        :param method:
+        :type method: str
+        :param params:
+        :type params: tuple | list
+        :return:
+        :rtype: Any
+        """
+        try:
+            proxy = self._local.proxy
+        except AttributeError:
+            proxy = self._local.proxy = get_server_proxy(self.uri, self.timeout)
+        return getattr(proxy, method)(*add_token(self.secret, method, params))
+
+    def close(self) -> None:
+        """
+        close the connection of the current thread, the others are closed when their
+        threads end
+        :return:
+        :rtype: None
+        """
+        proxy = self._local.__dict__.pop("proxy", None)
+        if proxy is not None:
+            proxy("close")()
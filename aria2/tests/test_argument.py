@@ -0,0 +1,93 @@
+"""
+The tests of the parser of the output of aria2c --help=#all
+"""
+from django.test import SimpleTestCase
+
+from ..models.argument.argument import parse_help
+
+HELP = """Usage: aria2c [OPTIONS] [URI | MAGNET | TORRENT_FILE | METALINK_FILE]...
+Printing options tagged with '#all'.
+See 'aria2c -h#help' to know all available tags.
+ -d, --dir=DIR                The directory to store the downloaded file.
+
+                              Possible Values: /path/to/directory
+                              Default: /root
+                              Tags: #basic, #file
+
+ --max-concurrent-downloads=N Set the maximum number of parallel downloads for
+                              every queue item.
+
+                              Possible Values: 1-*
+                              Default: 5
+                              Tags: #basic
+
+ --check-integrity[=true|false] Check file integrity.
+
+                              Possible Values: true, false
+                              Default: false
+                              Tags: #basic, #http-ftp, #checksum
+
+URI, MAGNET, TORRENT_FILE, METALINK_FILE:
+Refer to man page for more information.
+"""
+
+
+class ParseHelpTestCase(SimpleTestCase):
+    """
+    the fields and the tags of each argument
+    """
+
+    def setUp(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.records = parse_help(HELP)
+
+    def test_arguments(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.assertEqual(
+            [fields["long_argument"] for fields, _ in self.records],
+            ["--dir", "--max-concurrent-downloads", "--check-integrity"],
+        )
+
+    def test_fields(self) -> None:
+        """
+        the placeholder and the categories are parsed
+        :return:
+        :rtype: None
+        """
+        fields, tags = self.records[0]
+        self.assertEqual(fields["short_argument"], "-d")
+        self.assertEqual(fields["placeholder"], "DIR")
+        self.assertEqual(fields["possible_values"], "/path/to/directory")
+        self.assertEqual(fields["default"], "/root")
+        self.assertEqual(tags, ["#basic", "#file"])
+
+    def test_description(self) -> None:
+        """
+        the description continued on the next lines is joined
+        :return:
+        :rtype: None
+        """
+        fields, _ = self.records[1]
+        self.assertIsNone(fields["short_argument"])
+        self.assertEqual(
+            fields["description"],
+            "Set the maximum number of parallel downloads for every queue item.",
+        )
+
+    def test_optional_value(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        fields, _ = self.records[2]
+        self.assertEqual(fields["placeholder"], "true|false")
+        self.assertEqual(fields["possible_values"], "true, false")
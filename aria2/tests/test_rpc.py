@@ -0,0 +1,130 @@
+"""
+The tests of the utilities of the clients of the RPC interface of aria2
+"""
+from xmlrpc.client import Fault
+
+from django.test import SimpleTestCase
+
+from ..rpc.utils import add_token, get_result
+
+
+class AddTokenTestCase(SimpleTestCase):
+    """
+    the secret token prepended to the parameters
+    """
+
+    def test_aria2(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.assertEqual(
+            add_token("secret", "aria2.tellStatus", ("2089b05ecca3d829",)),
+            ["token:secret", "2089b05ecca3d829"],
+        )
+
+    def test_no_secret(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.assertEqual(add_token(None, "aria2.getVersion", ()), [])
+
+    def test_system(self) -> None:
+        """
+        the methods of system are not authorized by the token
+        :return:
+        :rtype: None
+        """
+        self.assertEqual(add_token("secret", "system.listMethods", ()), [])
+
+    def test_token_given(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.assertEqual(
+            add_token("secret", "aria2.getVersion", ("token:other",)), ["token:other"]
+        )
+
+    def test_multicall(self) -> None:
+        """
+        the token is prepended to each call, not to system.multicall
+        :return:
+        :rtype: None
+        """
+        self.assertEqual(
+            add_token(
+                "secret",
+                "system.multicall",
+                (
+                    [
+                        {"methodName": "aria2.getVersion", "params": []},
+                        {"methodName": "system.listMethods", "params": []},
+                    ],
+                ),
+            ),
+            [
+                [
+                    {"methodName": "aria2.getVersion", "params": ["token:secret"]},
+                    {"methodName": "system.listMethods", "params": []},
+                ]
+            ],
+        )
+
+
+class GetResultTestCase(SimpleTestCase):
+    """
+    the response of JSON-RPC as if returned by XML-RPC
+    """
+
+    def test_result(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.assertEqual(
+            get_result("aria2.getVersion", {"id": "1", "result": {"version": "1.36"}}),
+            {"version": "1.36"},
+        )
+
+    def test_error(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        with self.assertRaises(Fault) as context:
+            get_result(
+                "aria2.getVersion",
+                {"id": "1", "error": {"code": 1, "message": "Unauthorized"}},
+            )
+        self.assertEqual(context.exception.faultCode, 1)
+        self.assertEqual(context.exception.faultString, "Unauthorized")
+
+    def test_multicall(self) -> None:
+        """
+        the errors of the calls are returned as the fault structs
+        :return:
+        :rtype: None
+        """
+        self.assertEqual(
+            get_result(
+                "system.multicall",
+                {
+                    "id": "1",
+                    "result": [
+                        ["2089b05ecca3d829"],
+                        {"code": 1, "message": "GID is not found"},
+                    ],
+                },
+            ),
+            [
+                ["2089b05ecca3d829"],
+                {"faultCode": 1, "faultString": "GID is not found"},
+            ],
+        )
@@ -0,0 +1,117 @@
+"""
+The tests of the time series of the resources used by aria2c
+"""
+import math
+
+from django.test import SimpleTestCase
+
+from ..process.timeseries import METRICS, NAN, RingBuffer, TimeSeries
+
+
+def row(value: float) -> tuple[float, ...]:
+    """
+    the same value for all metrics
+    :param value:
+    :type value: float
+    :return:
+    :rtype: tuple[float, ...]
+    """
+    return (value,) * len(METRICS)
+
+
+class RingBufferTestCase(SimpleTestCase):
+    """
+    the rows at a fixed step
+    """
+
+    def test_wrap(self) -> None:
+        """
+        only the newest rows are kept
+        :return:
+        :rtype: None
+        """
+        buffer = RingBuffer(10, 3)
+        for index in range(5):
+            buffer.update(index, row(index))
+        self.assertEqual(list(buffer), [(20, row(2)), (30, row(3)), (40, row(4))])
+
+    def test_skipped(self) -> None:
+        """
+        the rows skipped are unknown, even if written before the wrap
+        :return:
+        :rtype: None
+        """
+        buffer = RingBuffer(10, 3)
+        for index in range(3):
+            buffer.update(index, row(index))
+        buffer.update(4, row(4))
+        self.assertEqual(list(buffer), [(20, row(2)), (40, row(4))])
+
+    def test_too_old(self) -> None:
+        """
+        the row older than the oldest one is dropped
+        :return:
+        :rtype: None
+        """
+        buffer = RingBuffer(10, 3)
+        buffer.update(5, row(5))
+        buffer.update(1, row(1))
+        self.assertEqual(list(buffer), [(50, row(5))])
+
+
+class TimeSeriesTestCase(SimpleTestCase):
+    """
+    the consolidation of the archives
+    """
+
+    def setUp(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.series = TimeSeries.create(((10, 6), (60, 4), (120, 2)))
+
+    def test_consolidate(self) -> None:
+        """
+        each coarser archive is the average of the rows finished in the finer one
+        :return:
+        :rtype: None
+        """
+        consolidated = [self.series.record(t, row(t)) for t in range(0, 190, 10)]
+        self.assertEqual(consolidated.count(True), 3)  # at 60, 120 and 180
+        self.assertTrue(consolidated[6])
+        self.assertEqual(
+            list(self.series.archives[1]),
+            [(0, row(25.0)), (60, row(85.0)), (120, row(145.0))],
+        )
+        self.assertEqual(list(self.series.archives[2]), [(0, row(55.0))])
+
+    def test_unknown_values(self) -> None:
+        """
+        the unknown values are not averaged
+        :return:
+        :rtype: None
+        """
+        self.series.record(0, (1.0, NAN, NAN, NAN, NAN, NAN))
+        self.series.record(10, (3.0, 2.0, NAN, NAN, NAN, NAN))
+        self.series.record(60, row(0.0))
+        ((timestamp, values),) = self.series.archives[1]
+        self.assertEqual(timestamp, 0)
+        self.assertEqual(values[:2], (2.0, 2.0))
+        self.assertTrue(all(math.isnan(value) for value in values[2:]))
+
+    def test_bytes(self) -> None:
+        """
+        the archives and the rows being consolidated survive the round trip
+        :return:
+        :rtype: None
+        """
+        for t in range(0, 130, 10):
+            self.series.record(t, row(t))
+        restored = TimeSeries.from_bytes(self.series.to_bytes())
+        for t in range(130, 190, 10):
+            self.series.record(t, row(t))
+            restored.record(t, row(t))
+        for archive, other in zip(self.series.archives, restored.archives):
+            self.assertEqual(list(archive), list(other))
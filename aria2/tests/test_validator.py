@@ -0,0 +1,140 @@
+"""
+The tests of the validator of the options of aria2c
+"""
+from django.test import SimpleTestCase
+
+from ..exceptions import InvalidOption
+from ..models.argument.validator import OptionValidator, parse_size
+
+CATALOG = (
+    ({"long_argument": "--dir", "possible_values": "/path/to/directory"}, ()),
+    ({"long_argument": "--check-integrity", "possible_values": "true, false"}, ()),
+    ({"long_argument": "--max-concurrent-downloads", "possible_values": "1-*"}, ()),
+    ({"long_argument": "--seed-ratio", "possible_values": "0.0-*"}, ()),
+    (
+        {
+            "long_argument": "--min-split-size",
+            "placeholder": "SIZE",
+            "possible_values": "1048576-1073741824",
+        },
+        (),
+    ),
+    ({"long_argument": "--max-download-limit", "placeholder": "SPEED"}, ()),
+    (
+        {
+            "long_argument": "--listen-port",
+            "placeholder": "PORT...",
+            "possible_values": "1024-65535",
+        },
+        (),
+    ),
+)
+
+
+class ParseSizeTestCase(SimpleTestCase):
+    """
+    the sizes with the suffixes K and M
+    """
+
+    def test_parse_size(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.assertEqual(parse_size("1024"), 1024)
+        self.assertEqual(parse_size("1K"), 1024)
+        self.assertEqual(parse_size("2m"), 2 * 1024 * 1024)
+        self.assertIsNone(parse_size("1G"))
+        self.assertIsNone(parse_size("-1"))
+
+
+class OptionValidatorTestCase(SimpleTestCase):
+    """
+    the validator compiled from the argument catalog
+    """
+
+    def setUp(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.validator = OptionValidator.compile(CATALOG)
+
+    def test_compile(self) -> None:
+        """
+        the arguments with free values are known but not checked
+        :return:
+        :rtype: None
+        """
+        self.assertEqual(len(self.validator.checks), len(CATALOG))
+        self.assertIsNone(self.validator.checks["--dir"])
+        self.assertIsNotNone(self.validator.checks["--max-download-limit"])
+
+    def test_valid(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.validator.validate(
+            {
+                "dir": "/tmp",
+                "check-integrity": "true",
+                "--max-concurrent-downloads": 5,
+                "seed-ratio": "1.5",
+                "min-split-size": "20M",
+                "max-download-limit": "512K",
+                "listen-port": "6881-6889,6999",
+            }
+        )
+
+    def test_enum(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        self.assertIn(
+            "must be one of false, true",
+            self.validator.get_errors({"check-integrity": "yes"})["check-integrity"],
+        )
+
+    def test_range(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        errors = self.validator.get_errors(
+            {
+                "max-concurrent-downloads": "0",
+                "seed-ratio": "fast",
+                "min-split-size": "1K",
+                "listen-port": "6881-70000",
+            }
+        )
+        self.assertEqual(
+            set(errors),
+            {"max-concurrent-downloads", "seed-ratio", "min-split-size", "listen-port"},
+        )
+        self.assertIn("must be in the range 1-*", errors["max-concurrent-downloads"])
+        self.assertIn("must be a number", errors["seed-ratio"])
+
+    def test_unknown(self) -> None:
+        """
+
+        :return:
+        :rtype: None
+        """
+        with self.assertRaisesMessage(InvalidOption, "is not an option of aria2c"):
+            self.validator.validate({"no-such-option": "1"})
+
+    def test_empty_catalog(self) -> None:
+        """
+        nothing is checked without a catalog
+        :return:
+        :rtype: None
+        """
+        OptionValidator.compile(()).validate({"no-such-option": "1"})
@@ -1,6 +1,52 @@
 """
 The settings of the application of aria2
 """
+from ..utils import BASE_DIR
 from .installed_apps import *
 
 ARIA2_DEFAULT_INSTANCE = "default"
+
+# the seconds to share the status snapshot of a GID before aria2.tellStatus again
+ARIA2_GID_STATUS_TTL = 2
+
+# the number of GIDs in one page of aria2.tellWaiting and aria2.tellStopped
+ARIA2_GID_SYNC_PAGE_SIZE = 1000
+
+# the maximum number of the concurrent calls, and the seconds of a call, when calling
+# the same method of many instances
+ARIA2_RPC_FAN_OUT_LIMIT = 16
+ARIA2_RPC_TIMEOUT = 10
+
+# the number of GID tasks submitted by one system.multicall
+ARIA2_GID_SUBMIT_CHUNK_SIZE = 1000
+
+# the seconds to share one scan of the running processes between the lookups of pids
+ARIA2_PROCESS_INDEX_TTL = 1
+
+# the seconds to wait for a launched instance to answer aria2.getVersion, and the
+# seconds between the first two probes, doubled after each probe
+ARIA2_LAUNCH_TIMEOUT = 30
+ARIA2_LAUNCH_BACKOFF = 0.05
+
+# the ports to allocate the RPC port of each instance from
+ARIA2_RPC_PORT_RANGE = (56800, 57800)
+
+# the ports to allocate the BitTorrent and DHT listen ports of each instance from, in
+# blocks of the given size
+ARIA2_LISTEN_PORT_RANGE = (6881, 16881)
+ARIA2_LISTEN_PORT_BLOCK = 10
+
+# the directory of the session file of each instance
+ARIA2_SESSION_DIR = BASE_DIR / "sessions"
+
+# the seconds to wait for the instances to exit after aria2.shutdown, and again after
+# aria2.forceShutdown and SIGTERM
+ARIA2_SHUTDOWN_TIMEOUT = 10
+
+# the step and the rows of each archive of the time series of the resources used by the
+# instances: the samples every 10 seconds for 1 hour, consolidated to 1 minute for 1
+# day and to 1 hour for 30 days
+ARIA2_SERIES_ARCHIVES = ((10, 360), (60, 1440), (3600, 720))
+
+# the directories to scan for aria2c besides those in $PATH
+ARIA2_BINARY_DIRS: tuple[str, ...] = ()